@@ -3,7 +3,7 @@ from django.utils.html import format_html
 
 import core.blog_settings
 
-from .models import Category, Comment, Location, Post
+from .models import Category, Comment, Location, Post, Tag
 
 admin.site.empty_value_display = 'Не задано'
 
@@ -51,6 +51,18 @@ class LocationAdmin(admin.ModelAdmin):
     )
 
 
+@admin.register(Tag)
+class TagAdmin(admin.ModelAdmin):
+    list_display = (
+        'title',
+        'status',
+    )
+    list_editable = (
+        'status',
+    )
+    list_filter = ('status',)
+
+
 @admin.register(Post)
 class PostAdmin(admin.ModelAdmin):
     def short_text(self, post_object):
@@ -1,22 +1,63 @@
-from django.http import JsonResponse
-from django.views.decorators.http import require_http_methods
+import hashlib
+import json
+
 from django.contrib.auth.decorators import login_required
+from django.db import transaction
+from django.http import HttpResponse, JsonResponse
+from django.urls import reverse
+from django.utils.cache import (
+    get_conditional_response, patch_cache_control, patch_vary_headers
+)
+from django.utils.http import quote_etag
+from django.views.decorators.http import require_http_methods
+
+import core.blog_settings
+
+from .graph_cache import (
+    decode_body, encode_payload, get_cached_graph, get_graph_index,
+    get_or_build_graph, subgraph_payload
+)
+from .graph_queries import collapse_single_parent, doc_lineage, top_referenced
 from .models import Tag
 
+GRAPH_ENCODINGS = ('zstd', 'gzip')
+"""Кодировки сжатия графа в порядке предпочтения."""
+
+GRAPH_SELECTORS = ('doc', 'top', 'collapse')
+"""Параметры запроса, выбирающие часть графа; допускается только один."""
+
+
+def parse_tag_ids(request):
+    """Извлекает список id тегов из JSON-тела запроса.
+
+    Некорректное тело запроса приводит к ValueError, на которую
+    представления отвечают статусом 400.
+    """
+    data = json.loads(request.body)
+    if not isinstance(data, dict):
+        raise ValueError('body must be a JSON object')
+    tag_ids = data.get('ids')
+    if not isinstance(tag_ids, list) or not all(
+        isinstance(tag_id, int) for tag_id in tag_ids
+    ):
+        raise ValueError('ids must be a list of integers')
+    return data, tag_ids
+
+
 @login_required
 @require_http_methods(["POST"])
 def toggle_tag_status(request, tag_id):
     try:
         tag = Tag.objects.get(id=tag_id)
-        
+
         # Переключаем статус
         data = json.loads(request.body)
         new_status = data.get('status')
-        
-        if new_status in ['active', 'inactive']:
+
+        if new_status in Tag.Status.values:
             tag.status = new_status
-            tag.save()
-            
+            tag.save(update_fields=('status',))
+
             return JsonResponse({
                 'success': True,
                 'status': new_status
@@ -26,7 +67,7 @@ def toggle_tag_status(request, tag_id):
                 'success': False,
                 'error': 'Invalid status'
             }, status=400)
-            
+
     except Tag.DoesNotExist:
         return JsonResponse({
             'success': False,
@@ -38,17 +79,18 @@ def toggle_tag_status(request, tag_id):
             'error': str(e)
         }, status=500)
 
+
 @login_required
 @require_http_methods(["DELETE"])
 def delete_tag(request, tag_id):
     try:
         tag = Tag.objects.get(id=tag_id)
         tag.delete()
-        
+
         return JsonResponse({
             'success': True
         })
-        
+
     except Tag.DoesNotExist:
         return JsonResponse({
             'success': False,
@@ -61,16 +103,264 @@ def delete_tag(request, tag_id):
         }, status=500)
 
 
-"""
-from django.urls import path
-from . import views
+@login_required
+@require_http_methods(["POST"])
+def toggle_tags_status(request):
+    """Меняет статус нескольких тегов одним запросом к БД.
+
+    Тело запроса: {"ids": [1, 2, 3], "status": "inactive"}. Если статус
+    не указан, статус каждого тега меняется на противоположный.
+    """
+    try:
+        data, tag_ids = parse_tag_ids(request)
+        new_status = data.get('status')
+        if new_status is not None and new_status not in Tag.Status.values:
+            return JsonResponse({
+                'success': False,
+                'error': 'Invalid status'
+            }, status=400)
+
+        with transaction.atomic():
+            tags = list(
+                Tag.objects.select_for_update()
+                .filter(id__in=tag_ids)
+                .only('id', 'status')
+            )
+            for tag in tags:
+                if new_status is not None:
+                    tag.status = new_status
+                elif tag.status == Tag.Status.ACTIVE:
+                    tag.status = Tag.Status.INACTIVE
+                else:
+                    tag.status = Tag.Status.ACTIVE
+            Tag.objects.bulk_update(tags, ('status',))
+
+        return JsonResponse({
+            'success': True,
+            'statuses': {tag.id: tag.status for tag in tags},
+            'not_found': sorted(set(tag_ids) - {tag.id for tag in tags})
+        })
+
+    except ValueError as e:
+        return JsonResponse({
+            'success': False,
+            'error': str(e)
+        }, status=400)
+    except Exception as e:
+        return JsonResponse({
+            'success': False,
+            'error': str(e)
+        }, status=500)
 
-urlpatterns = [
-    path('api/tags/<int:tag_id>/toggle-status/', views.toggle_tag_status, name='toggle_tag_status'),
-    path('api/tags/<int:tag_id>/delete/', views.delete_tag, name='delete_tag'),
-    # ... другие маршруты
-]
 
+@login_required
+@require_http_methods(["DELETE", "POST"])
+def delete_tags(request):
+    """Удаляет несколько тегов в одной транзакции.
 
+    Тело запроса: {"ids": [1, 2, 3]}.
+    """
+    try:
+        _, tag_ids = parse_tag_ids(request)
+        with transaction.atomic():
+            _, deleted = Tag.objects.filter(id__in=tag_ids).delete()
 
-"""
\ No newline at end of file
+        return JsonResponse({
+            'success': True,
+            'deleted': deleted.get(Tag._meta.label, 0)
+        })
+
+    except ValueError as e:
+        return JsonResponse({
+            'success': False,
+            'error': str(e)
+        }, status=400)
+    except Exception as e:
+        return JsonResponse({
+            'success': False,
+            'error': str(e)
+        }, status=500)
+
+
+def choose_encoding(request, available):
+    """Выбирает кодировку сжатия по заголовку Accept-Encoding.
+
+    Возвращает None, если клиент не принимает ни одну из доступных.
+    """
+    accepted = {}
+    for item in request.headers.get('Accept-Encoding', '').split(','):
+        coding, _, params = item.strip().partition(';')
+        quality = 1.0
+        name, _, value = params.strip().partition('=')
+        if name == 'q':
+            try:
+                quality = float(value)
+            except ValueError:
+                quality = 0.0
+        accepted[coding.strip().lower()] = quality
+    for encoding in GRAPH_ENCODINGS:
+        if encoding in available and accepted.get(encoding, 0) > 0:
+            return encoding
+    return None
+
+
+def graph_etag(tag):
+    """Возвращает слабый ETag графа.
+
+    Один и тот же граф отдаётся в разных кодировках (gzip, zstd или без
+    сжатия), тела ответов различаются побайтно, поэтому сильный ETag
+    для них некорректен.
+    """
+    return 'W/' + quote_etag(tag)
+
+
+def graph_response(request, etag, bodies, cache_hit):
+    """Отдаёт граф сжатым, если клиент это поддерживает."""
+    encoding = choose_encoding(request, bodies)
+    if encoding is None:
+        response = HttpResponse(
+            decode_body(bodies['gzip'], 'gzip'),
+            content_type='application/json'
+        )
+    else:
+        response = HttpResponse(
+            bodies[encoding], content_type='application/json'
+        )
+        response['Content-Encoding'] = encoding
+    # Граф адресуется хешем содержимого и никогда не меняется.
+    response['ETag'] = etag
+    response['X-Graph-Cache'] = 'hit' if cache_hit else 'miss'
+    patch_vary_headers(response, ('Accept-Encoding',))
+    patch_cache_control(
+        response,
+        private=True,
+        immutable=True,
+        max_age=core.blog_settings.GRAPH_CACHE_TIMEOUT
+    )
+    return response
+
+
+@login_required
+@require_http_methods(["POST"])
+def build_graph(request):
+    """Строит граф трассировки документов или берёт его из кеша.
+
+    Тело запроса: {"statistic_data": [...], "docs_data": {...}}.
+    Граф с координатами узлов кешируется по хешу трассы; адрес
+    закешированного графа возвращается в заголовке Location.
+    """
+    try:
+        data = json.loads(request.body)
+        statistic_data = data['statistic_data']
+        docs_data = data.get('docs_data', {})
+        if not isinstance(statistic_data, list) or not isinstance(
+            docs_data, dict
+        ):
+            raise ValueError(
+                'statistic_data must be a list and docs_data an object'
+            )
+        digest, bodies, cache_hit = get_or_build_graph(
+            statistic_data, docs_data
+        )
+    except (ValueError, KeyError, TypeError, AttributeError) as e:
+        return JsonResponse({
+            'success': False,
+            'error': f'Invalid trace: {e!r}'
+        }, status=400)
+
+    response = graph_response(request, graph_etag(digest), bodies, cache_hit)
+    response['Location'] = reverse('blog:graph_detail', args=(digest,))
+    return response
+
+
+def parse_int_param(params, name, default=None):
+    """Читает неотрицательное целое из параметров запроса."""
+    value = params.get(name)
+    if value is None:
+        return default
+    if not value.isdigit():
+        raise ValueError(f'{name} must be a non-negative integer')
+    return int(value)
+
+
+def select_subgraph(index, digest, params):
+    """Строит часть графа по параметрам запроса.
+
+    doc=<id>[&direction=ancestors|descendants|both][&depth=N] — документ
+    с предками и/или потомками; top=K — K самых цитируемых узлов каждого
+    этапа; collapse=1 — граф со свёрнутыми узлами с одним родителем.
+    """
+    compact = index[0]
+    if 'doc' in params:
+        doc_id = params['doc']
+        if not compact.nodes_of_doc(doc_id) and doc_id.lstrip('-').isdigit():
+            doc_id = int(doc_id)
+        nodes = doc_lineage(
+            compact,
+            doc_id,
+            params.get('direction', 'both'),
+            parse_int_param(params, 'depth')
+        )
+        return subgraph_payload(index, digest, nodes)
+    if 'top' in params:
+        nodes = sorted(
+            node
+            for stage_nodes in top_referenced(
+                compact, parse_int_param(params, 'top')
+            ).values()
+            for node in stage_nodes
+        )
+        return subgraph_payload(index, digest, nodes)
+    nodes, edges, collapsed = collapse_single_parent(compact)
+    return subgraph_payload(
+        index, digest, nodes, edges,
+        collapsed=[collapsed[node] for node in nodes]
+    )
+
+
+@login_required
+@require_http_methods(["GET"])
+def graph_detail(request, digest):
+    """Отдаёт закешированный граф или его часть по хешу трассы.
+
+    Часть графа выбирается одним из параметров GRAPH_SELECTORS
+    (см. select_subgraph). Если граф вытеснен из кеша, возвращается 404:
+    клиент должен повторно отправить трассу в build_graph.
+    """
+    selectors = [name for name in GRAPH_SELECTORS if name in request.GET]
+    if len(selectors) > 1:
+        return JsonResponse({
+            'success': False,
+            'error': f'Only one of {", ".join(GRAPH_SELECTORS)} is allowed'
+        }, status=400)
+
+    etag = digest
+    if selectors:
+        query = sorted(request.GET.items())
+        etag = hashlib.sha256(f'{digest}{query}'.encode()).hexdigest()
+    etag = graph_etag(etag)
+    not_modified = get_conditional_response(request, etag=etag)
+    if not_modified is not None:
+        return not_modified
+
+    if not selectors:
+        bodies = get_cached_graph(digest)
+    else:
+        index = get_graph_index(digest)
+        bodies = None
+        if index is not None:
+            try:
+                bodies = encode_payload(
+                    select_subgraph(index, digest, request.GET)
+                )
+            except ValueError as e:
+                return JsonResponse({
+                    'success': False,
+                    'error': str(e)
+                }, status=400)
+    if bodies is None:
+        return JsonResponse({
+            'success': False,
+            'error': 'Graph not found'
+        }, status=404)
+    return graph_response(request, etag, bodies, cache_hit=True)
@@ -0,0 +1,260 @@
+import hashlib
+import time
+from functools import wraps
+
+from django.core.cache import cache
+from django.db.models import Q
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+import core.blog_settings
+
+from .models import Post
+from .pagination import InvalidCursor, decode_cursor
+
+VERSION_KEY = 'blog:version:{name}:{pk}'
+"""Шаблон ключа счётчика версии объекта в кеше."""
+
+FEED_VERSION_KEY = 'blog:feed_version'
+"""Ключ версии лент публикаций в кеше."""
+
+FEED_RESPONSE_KEY = 'blog:feed:{view}:{category_slug}:{page}:{version}'
+"""Шаблон ключа закешированного ответа ленты."""
+
+FEED_STATS_KEY = 'blog:feed_cache:{name}'
+"""Шаблон ключа счётчика попаданий и промахов кеша лент."""
+
+CONDITIONAL_METHODS = ('GET', 'HEAD')
+"""Методы, для которых поддерживаются условные запросы."""
+
+
+def version_key(name, pk):
+    """Возвращает ключ счётчика версии объекта."""
+    return VERSION_KEY.format(name=name, pk=pk)
+
+
+def _initial_version():
+    # Счётчик, вытесненный из кеша, не должен начаться заново с тех же
+    # значений: иначе станут доступны устаревшие фрагменты.
+    return time.time_ns()
+
+
+def _bump(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, _initial_version(), timeout=None)
+
+
+def bump_version(name, pk):
+    """Увеличивает версию объекта, делая его фрагменты устаревшими."""
+    _bump(version_key(name, pk))
+
+
+def get_versions(keys):
+    """Возвращает версии для набора ключей одним обращением к кешу."""
+    versions = cache.get_many(keys)
+    missing = {
+        key: _initial_version() for key in keys if key not in versions
+    }
+    if missing:
+        cache.set_many(missing, timeout=None)
+        versions.update(missing)
+    return versions
+
+
+def card_version_keys(post):
+    """Ключи версий всех объектов, от которых зависит карточка поста."""
+    return (
+        version_key('post', post.pk),
+        version_key('user', post.author_id),
+        version_key('category', post.category_id),
+        version_key('location', post.location_id),
+    )
+
+
+def attach_card_versions(posts):
+    """Проставляет постам атрибут card_version для кеша карточек.
+
+    Версия карточки составляется из версий поста, автора, категории
+    и местоположения, поэтому изменение любого из них даёт новый ключ
+    фрагмента. Все версии страницы читаются одним запросом к кешу.
+    """
+    posts = list(posts)
+    keys = {key for post in posts for key in card_version_keys(post)}
+    versions = get_versions(keys)
+    for post in posts:
+        post.card_version = '.'.join(
+            str(versions[key]) for key in card_version_keys(post)
+        )
+    return posts
+
+
+def get_feed_version():
+    """Возвращает текущую версию лент публикаций."""
+    return get_versions((FEED_VERSION_KEY,))[FEED_VERSION_KEY]
+
+
+def bump_feed_version():
+    """Делает устаревшими все закешированные ленты публикаций."""
+    _bump(FEED_VERSION_KEY)
+
+
+def _count(name):
+    key = FEED_STATS_KEY.format(name=name)
+    cache.add(key, 0, timeout=None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        pass
+
+
+def feed_cache_stats():
+    """Возвращает счётчики попаданий и промахов кеша лент."""
+    names = ('hits', 'misses')
+    values = cache.get_many(
+        [FEED_STATS_KEY.format(name=name) for name in names]
+    )
+    return {
+        name: values.get(FEED_STATS_KEY.format(name=name), 0)
+        for name in names
+    }
+
+
+def feed_page_key(request, page_param='page', cursor_param='cursor'):
+    """Возвращает нормализованный номер страницы или курсор ленты.
+
+    В ключ кеша попадают только параметры, которые использует лента:
+    посторонние параметры, их порядок и неразборчивые значения не
+    порождают новых записей в кеше. Некорректный номер страницы
+    заменяется первой страницей, некорректный курсор — пустым,
+    как и при выборке страницы.
+    """
+    cursor = request.GET.get(cursor_param)
+    if core.blog_settings.CURSOR_PAGINATION or cursor is not None:
+        try:
+            direction, value, pk = decode_cursor(cursor or '')
+        except InvalidCursor:
+            return 'cursor:'
+        return f'cursor:{direction},{value.isoformat()},{pk}'
+    page = request.GET.get(page_param, '')
+    return 'page:' + str(int(page) if page.isdecimal() and int(page) else 1)
+
+
+def cache_feed_for_anonymous(view):
+    """Кеширует ответы ленты для неавторизованных читателей.
+
+    Ключ ответа включает имя представления, slug категории, номер
+    страницы или курсор и версию лент, поэтому любое изменение постов,
+    комментариев, категорий или местоположений делает закешированные
+    ленты устаревшими. Попадание в кеш не обращается к базе данных
+    и воспроизводит все заголовки исходного ответа.
+    """
+    @wraps(view)
+    def wrapper(request, **kwargs):
+        if request.method != 'GET' or request.user.is_authenticated:
+            return view(request, **kwargs)
+
+        key = FEED_RESPONSE_KEY.format(
+            view=view.__name__,
+            category_slug=kwargs.get('category_slug', ''),
+            page=feed_page_key(request),
+            version=get_feed_version(),
+        )
+        cached = cache.get(key)
+        if cached is not None:
+            _count('hits')
+            content, headers = cached
+            response = HttpResponse(content)
+            for header, value in headers:
+                response[header] = value
+            return response
+
+        _count('misses')
+        response = view(request, **kwargs)
+        if response.status_code == 200:
+            cache.set(
+                key,
+                (response.content, list(response.items())),
+                core.blog_settings.FEED_CACHE_TIMEOUT
+            )
+        return response
+
+    return wrapper
+
+
+def post_validators(post_id, *parts, visible_to=None):
+    """Возвращает ETag и Last-Modified поста или (None, None).
+
+    Валидаторы вычисляются одним запросом по первичному ключу поста
+    из отметок updated_at поста, его категории и местоположения;
+    комментарии обновляют updated_at своего поста. Дополнительные
+    части parts (например, пользователь или набор полей) входят в ETag.
+
+    Если передан пользователь visible_to, валидаторы есть только у поста,
+    который ему виден (как в check_post_visibility): иначе ответ 304
+    выдал бы существование скрытого поста.
+    """
+    posts = Post.objects.all()
+    if visible_to is not None:
+        visible = Q(
+            is_published=True, is_visible=True, category__is_published=True
+        )
+        if visible_to.is_authenticated:
+            visible |= Q(author=visible_to)
+        posts = posts.filter(visible)
+    try:
+        stamps = posts.filter(pk=post_id).values_list(
+            'updated_at', 'category__updated_at', 'location__updated_at'
+        ).first()
+    except (TypeError, ValueError):
+        return None, None
+    if stamps is None:
+        return None, None
+    raw = ':'.join(str(part) for part in (post_id, *stamps, *parts))
+    etag = quote_etag(hashlib.md5(raw.encode()).hexdigest())
+    last_modified = max(stamp for stamp in stamps if stamp is not None)
+    return etag, last_modified
+
+
+def conditional_response(request, etag, last_modified):
+    """Возвращает ответ 304/412, если условия запроса выполнены."""
+    if etag is None or request.method not in CONDITIONAL_METHODS:
+        return None
+    return get_conditional_response(
+        request, etag=etag, last_modified=int(last_modified.timestamp())
+    )
+
+
+def set_validators(response, etag, last_modified):
+    """Проставляет ответу заголовки ETag и Last-Modified."""
+    if etag is not None and response.status_code in (200, 304):
+        response.headers.setdefault('ETag', etag)
+        response.headers.setdefault(
+            'Last-Modified', http_date(last_modified.timestamp())
+        )
+    return response
+
+
+def condition_on_post(view):
+    """Поддерживает условные GET-запросы к странице поста.
+
+    Если If-None-Match или If-Modified-Since совпадают с текущими
+    валидаторами видимого пользователю поста, возвращается 304 без
+    выборки поста и отрисовки шаблона. Страница зависит от пользователя
+    (форма комментария, кнопки автора), поэтому его id входит в ETag.
+    """
+    @wraps(view)
+    def wrapper(request, post_id, **kwargs):
+        etag, last_modified = (None, None)
+        if request.method in CONDITIONAL_METHODS:
+            etag, last_modified = post_validators(
+                post_id, request.user.pk or 0, visible_to=request.user
+            )
+        response = conditional_response(request, etag, last_modified)
+        if response is None:
+            response = view(request, post_id=post_id, **kwargs)
+        return set_validators(response, etag, last_modified)
+
+    return wrapper
@@ -0,0 +1,336 @@
+from array import array
+
+from .graph_processing import DocumentTraversalBuilder, empty_graph
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+INDEX_TYPECODE = 'i'
+"""Тип элементов индексных массивов (array), 32-битное целое."""
+
+INDEX_ARRAYS = (
+    'stage_order', 'node_stage', 'node_doc', 'ref_offsets', 'ref_docs',
+    'edge_from', 'edge_to'
+)
+"""Индексные массивы CompactGraph, входящие в его JSON-представление."""
+
+
+def _index_array(values=()):
+    return array(INDEX_TYPECODE, values)
+
+
+def _csr(sources, targets, size):
+    """Строит CSR-смежность (indptr, indices) сортировкой подсчётом.
+
+    Соседи каждого узла идут в том же порядке, что и рёбра в списке.
+    """
+    indptr = _index_array([0]) * (size + 1)
+    for source in sources:
+        indptr[source + 1] += 1
+    for position in range(size):
+        indptr[position + 1] += indptr[position]
+    fill = indptr[:-1]
+    indices = _index_array([0]) * len(targets)
+    for source, target in zip(sources, targets):
+        indices[fill[source]] = target
+        fill[source] += 1
+    return indptr, indices
+
+
+class CompactGraph:
+    """
+    Компактное представление графа трассировки документов
+
+    Вместо словарей с составными ключами f"{stage}_{doc_id}" узел — это
+    целый номер, а его атрибуты хранятся в параллельных массивах:
+    node_stage (номер имени этапа в stage_names) и node_doc (номер id
+    документа в doc_ids). Имена этапов и id документов хранятся по одному
+    разу. Ссылки узлов хранятся в CSR-виде (ref_offsets, ref_docs), рёбра —
+    парами массивов edge_from/edge_to в исходном порядке; смежность в виде
+    CSR строится по требованию (out_csr, in_csr, doc_csr).
+
+    to_dict и from_dict преобразуют граф в формат build_document_traversal
+    и обратно без потерь.
+    """
+
+    def __init__(self):
+        self.stage_names = []
+        self.stage_order = _index_array()
+        self.doc_ids = []
+        self.doc_info = []
+        self.node_stage = _index_array()
+        self.node_doc = _index_array()
+        self.ref_offsets = _index_array([0])
+        self.ref_docs = _index_array()
+        self.edge_from = _index_array()
+        self.edge_to = _index_array()
+        self._stage_index = {}
+        self._doc_index = {}
+        self._indexes = {}
+
+    @property
+    def node_count(self):
+        return len(self.node_doc)
+
+    @property
+    def edge_count(self):
+        return len(self.edge_from)
+
+    def _intern_stage(self, stage_name):
+        if stage_name not in self._stage_index:
+            self._stage_index[stage_name] = len(self.stage_names)
+            self.stage_names.append(stage_name)
+        return self._stage_index[stage_name]
+
+    def _intern_doc(self, doc_id):
+        if doc_id not in self._doc_index:
+            self._doc_index[doc_id] = len(self.doc_ids)
+            self.doc_ids.append(doc_id)
+            self.doc_info.append(None)
+        return self._doc_index[doc_id]
+
+    def _extend(self, stage_order, nodes, edges, node_index):
+        """Добавляет этапы, узлы и рёбра в формате графа-словаря.
+
+        node_index — общий для всех вызовов словарь «ключ узла -> номер»,
+        по которому разрешаются концы рёбер.
+        """
+        self._indexes.clear()
+        for stage_name in stage_order:
+            self.stage_order.append(self._intern_stage(stage_name))
+        for node_key, node in nodes.items():
+            node_index[node_key] = self.node_count
+            doc = self._intern_doc(node['original_id'])
+            self.node_stage.append(self._intern_stage(node['stage']))
+            self.node_doc.append(doc)
+            if node['info'] and self.doc_info[doc] is None:
+                self.doc_info[doc] = node['info']
+            self.ref_docs.extend(
+                self._intern_doc(ref_doc_id) for ref_doc_id in node['refs']
+            )
+            self.ref_offsets.append(len(self.ref_docs))
+        for edge in edges:
+            self.edge_from.append(node_index[edge['from']])
+            self.edge_to.append(node_index[edge['to']])
+
+    @classmethod
+    def from_dict(cls, graph):
+        """Строит компактный граф из графа build_document_traversal."""
+        compact = cls()
+        compact._extend(
+            graph['stage_order'], graph['nodes'], graph['edges'], {}
+        )
+        return compact
+
+    @classmethod
+    def from_deltas(cls, deltas):
+        """Строит компактный граф из приращений DocumentTraversalBuilder.
+
+        Узлы и рёбра в формате словарей существуют только в пределах
+        одного этапа, поэтому весь граф-словарь в памяти не собирается.
+        """
+        compact = cls()
+        node_index = {}
+        for delta in deltas:
+            compact._extend(
+                (delta['stage'],), delta['nodes'], delta['edges'], node_index
+            )
+        return compact
+
+    @classmethod
+    def from_traversal(cls, statistic_data, docs_data):
+        """Аналог build_document_traversal, возвращающий CompactGraph."""
+        builder = DocumentTraversalBuilder(docs_data)
+        return cls.from_deltas(builder.add_stages(statistic_data))
+
+    def to_json(self):
+        """Возвращает граф в виде JSON-совместимого словаря столбцов.
+
+        Массивы передаются списками чисел, имена этапов и id документов —
+        по одному разу, описания документов — по номеру документа.
+        """
+        data = {name: list(getattr(self, name)) for name in INDEX_ARRAYS}
+        data['stages'] = list(self.stage_names)
+        data['docs'] = list(self.doc_ids)
+        data['info'] = {
+            str(doc): info for doc, info in enumerate(self.doc_info) if info
+        }
+        return data
+
+    @classmethod
+    def from_json(cls, data):
+        """Восстанавливает граф из словаря to_json."""
+        compact = cls()
+        for name in INDEX_ARRAYS:
+            setattr(compact, name, _index_array(data[name]))
+        compact.stage_names = list(data['stages'])
+        compact.doc_ids = list(data['docs'])
+        compact.doc_info = [None] * len(compact.doc_ids)
+        for doc, info in data['info'].items():
+            compact.doc_info[int(doc)] = info
+        compact._stage_index = {
+            name: stage for stage, name in enumerate(compact.stage_names)
+        }
+        compact._doc_index = {
+            doc_id: doc for doc, doc_id in enumerate(compact.doc_ids)
+        }
+        return compact
+
+    def node_key(self, node):
+        """Ключ узла в формате графа-словаря."""
+        return (
+            f"{self.stage_names[self.node_stage[node]]}_"
+            f"{self.doc_ids[self.node_doc[node]]}"
+        )
+
+    def node_refs(self, node):
+        """Id документов, на которые ссылается узел."""
+        start, end = self.ref_offsets[node], self.ref_offsets[node + 1]
+        return [self.doc_ids[doc] for doc in self.ref_docs[start:end]]
+
+    def to_dict(self):
+        """Преобразует граф в формат build_document_traversal."""
+        graph = empty_graph()
+        graph['stage_order'] = [
+            self.stage_names[stage] for stage in self.stage_order
+        ]
+        keys = [self.node_key(node) for node in range(self.node_count)]
+        for node, node_key in enumerate(keys):
+            doc = self.node_doc[node]
+            graph['nodes'][node_key] = {
+                'id': node_key,
+                'original_id': self.doc_ids[doc],
+                'stage': self.stage_names[self.node_stage[node]],
+                'refs': self.node_refs(node),
+                'info': self.doc_info[doc] or {}
+            }
+        for source, target in zip(self.edge_from, self.edge_to):
+            graph['edges'].append({
+                'id': f"{keys[source]}_{keys[target]}",
+                'from': keys[source],
+                'to': keys[target]
+            })
+        return graph
+
+    def out_csr(self):
+        """Исходящая смежность (indptr, indices) в формате CSR.
+
+        Соседи узла n — indices[indptr[n]:indptr[n + 1]].
+        """
+        if 'out' not in self._indexes:
+            self._indexes['out'] = _csr(
+                self.edge_from, self.edge_to, self.node_count
+            )
+        return self._indexes['out']
+
+    def in_csr(self):
+        """Входящая смежность в том же формате, что и out_csr."""
+        if 'in' not in self._indexes:
+            self._indexes['in'] = _csr(
+                self.edge_to, self.edge_from, self.node_count
+            )
+        return self._indexes['in']
+
+    def doc_csr(self):
+        """Узлы каждого документа: indices[indptr[d]:indptr[d + 1]]."""
+        if 'doc' not in self._indexes:
+            self._indexes['doc'] = _csr(
+                self.node_doc, range(self.node_count), len(self.doc_ids)
+            )
+        return self._indexes['doc']
+
+    def ranked_by_stage(self):
+        """Узлы каждого этапа по убыванию числа ссылок на них.
+
+        Число ссылок — количество исходящих рёбер узла, то есть узлов
+        следующих этапов, ссылающихся на его документ. Результат —
+        словарь {номер этапа: [номера узлов]}.
+        """
+        if 'ranked' not in self._indexes:
+            indptr, _ = self.out_csr()
+            ranked = {}
+            for node, stage in enumerate(self.node_stage):
+                ranked.setdefault(stage, []).append(node)
+            for nodes in ranked.values():
+                nodes.sort(key=lambda node: indptr[node] - indptr[node + 1])
+            self._indexes['ranked'] = ranked
+        return self._indexes['ranked']
+
+    def build_indexes(self):
+        """Строит индексы заранее, например перед кешированием.
+
+        Кроме смежности строится и ранжирование узлов по числу ссылок,
+        поэтому граф, восстановленный из кеша, не сортирует узлы заново.
+        """
+        self.out_csr()
+        self.in_csr()
+        self.doc_csr()
+        self.ranked_by_stage()
+        return self
+
+    def nodes_of_doc(self, doc_id):
+        """Номера узлов документа doc_id на всех этапах."""
+        doc = self._doc_index.get(doc_id)
+        if doc is None:
+            return []
+        indptr, indices = self.doc_csr()
+        return list(indices[indptr[doc]:indptr[doc + 1]])
+
+    def subgraph(self, nodes, edges=None):
+        """Возвращает граф из узлов nodes (номеров этого графа).
+
+        Если edges не переданы, берутся рёбра между узлами nodes;
+        иначе edges — пары номеров узлов этого графа. В новый граф
+        переносятся только документы его узлов и их ссылок.
+        """
+        nodes = list(nodes)
+        position = {node: index for index, node in enumerate(nodes)}
+        if edges is None:
+            indptr, indices = self.out_csr()
+            edges = [
+                (source, target)
+                for source in nodes
+                for target in indices[indptr[source]:indptr[source + 1]]
+                if target in position
+            ]
+        sub = type(self)()
+        sub.stage_names = list(self.stage_names)
+        sub.stage_order = _index_array(self.stage_order)
+        sub._stage_index = dict(self._stage_index)
+
+        def intern_doc(doc):
+            sub_doc = sub._intern_doc(self.doc_ids[doc])
+            sub.doc_info[sub_doc] = self.doc_info[doc]
+            return sub_doc
+
+        for node in nodes:
+            sub.node_stage.append(self.node_stage[node])
+            sub.node_doc.append(intern_doc(self.node_doc[node]))
+            start, end = self.ref_offsets[node], self.ref_offsets[node + 1]
+            sub.ref_docs.extend(
+                intern_doc(doc) for doc in self.ref_docs[start:end]
+            )
+            sub.ref_offsets.append(len(sub.ref_docs))
+        for source, target in edges:
+            sub.edge_from.append(position[source])
+            sub.edge_to.append(position[target])
+        return sub
+
+    def as_numpy(self):
+        """Возвращает массивы графа как массивы NumPy без копирования.
+
+        Массивы NumPy разделяют память с массивами графа, поэтому граф
+        нельзя расширять, пока они используются.
+        """
+        if numpy is None:
+            raise RuntimeError('Для as_numpy требуется пакет numpy.')
+        indptr, indices = self.out_csr()
+        arrays = {name: getattr(self, name) for name in INDEX_ARRAYS}
+        arrays.update(indptr=indptr, indices=indices)
+        return {
+            name: numpy.frombuffer(values, dtype=INDEX_TYPECODE)
+            if values else numpy.zeros(0, dtype=INDEX_TYPECODE)
+            for name, values in arrays.items()
+        }
@@ -0,0 +1,161 @@
+import gzip
+import hashlib
+import json
+from array import array
+
+from django.core.cache import cache
+
+import core.blog_settings
+
+from .compact_graph import CompactGraph
+from .graph_layout import layered_layout
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+GRAPH_KEY = 'blog:graph:{digest}'
+"""Шаблон ключа закешированного графа трассировки."""
+
+GRAPH_INDEX_KEY = 'blog:graph_index:{digest}'
+"""Шаблон ключа закешированного графа с индексами для запросов."""
+
+GRAPH_FORMAT_VERSION = 1
+"""Версия формата графа; входит в хеш, чтобы смена формата сбрасывала кеш."""
+
+COORDINATE_DIGITS = 2
+"""Количество знаков после запятой в координатах узлов."""
+
+
+def trace_digest(statistic_data, docs_data):
+    """Возвращает SHA-256 канонического JSON трассы.
+
+    Одинаковые трассы дают одинаковый хеш независимо от порядка ключей
+    в словарях, поэтому хеш служит адресом графа в кеше.
+    """
+    canonical = json.dumps(
+        [GRAPH_FORMAT_VERSION, statistic_data, docs_data],
+        sort_keys=True,
+        separators=(',', ':'),
+        ensure_ascii=False,
+        default=str
+    )
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def build_graph(statistic_data, docs_data):
+    """Строит граф трассы и координаты его узлов.
+
+    Возвращает (CompactGraph с построенными индексами, xs, ys).
+    """
+    compact = CompactGraph.from_traversal(statistic_data, docs_data)
+    _, xs, ys = layered_layout(compact)
+    return compact.build_indexes(), xs, ys
+
+
+def graph_payload(compact, xs, ys, digest, **extra):
+    """Возвращает граф с координатами узлов в компактном JSON-виде."""
+    payload = compact.to_json()
+    payload['digest'] = digest
+    payload['version'] = GRAPH_FORMAT_VERSION
+    payload['x'] = [round(x, COORDINATE_DIGITS) for x in xs]
+    payload['y'] = [round(y, COORDINATE_DIGITS) for y in ys]
+    payload.update(extra)
+    return payload
+
+
+def subgraph_payload(index, digest, nodes, edges=None, **extra):
+    """Возвращает часть графа из узлов nodes в компактном JSON-виде.
+
+    Узлы сохраняют координаты полного графа; в поле nodes передаются
+    их номера в полном графе.
+    """
+    compact, xs, ys = index
+    nodes = list(nodes)
+    return graph_payload(
+        compact.subgraph(nodes, edges),
+        (xs[node] for node in nodes),
+        (ys[node] for node in nodes),
+        digest,
+        nodes=nodes,
+        **extra
+    )
+
+
+def encode_payload(payload):
+    """Сериализует граф и сжимает его всеми доступными способами.
+
+    Возвращает словарь {кодировка: тело ответа}; gzip доступен всегда,
+    zstd — если установлен пакет zstandard.
+    """
+    raw = json.dumps(
+        payload, separators=(',', ':'), ensure_ascii=False
+    ).encode()
+    bodies = {'gzip': gzip.compress(raw, mtime=0)}
+    if zstandard is not None:
+        bodies['zstd'] = zstandard.ZstdCompressor().compress(raw)
+    return bodies
+
+
+def decode_body(body, encoding):
+    """Распаковывает тело ответа в исходный JSON."""
+    if encoding == 'zstd':
+        return zstandard.ZstdDecompressor().decompress(body)
+    if encoding == 'gzip':
+        return gzip.decompress(body)
+    return body
+
+
+def get_cached_graph(digest):
+    """Возвращает сжатые тела графа из кеша или None."""
+    return cache.get(GRAPH_KEY.format(digest=digest))
+
+
+def _cache_index(digest, compact, xs, ys):
+    index = (compact, array('d', xs), array('d', ys))
+    cache.set(
+        GRAPH_INDEX_KEY.format(digest=digest),
+        index,
+        core.blog_settings.GRAPH_CACHE_TIMEOUT
+    )
+    return index
+
+
+def get_graph_index(digest):
+    """Возвращает (CompactGraph, xs, ys) графа для запросов или None.
+
+    Граф хранится в кеше вместе с индексами смежности, поэтому запросы
+    к нему не пересчитывают их. Если вытеснен только граф с индексами,
+    он восстанавливается из закешированного JSON.
+    """
+    index = cache.get(GRAPH_INDEX_KEY.format(digest=digest))
+    if index is not None:
+        return index
+    bodies = get_cached_graph(digest)
+    if bodies is None:
+        return None
+    payload = json.loads(decode_body(bodies['gzip'], 'gzip'))
+    compact = CompactGraph.from_json(payload).build_indexes()
+    return _cache_index(digest, compact, payload['x'], payload['y'])
+
+
+def get_or_build_graph(statistic_data, docs_data):
+    """Возвращает хеш трассы, сжатые тела графа и признак попадания в кеш.
+
+    Повторный запрос той же трассы обходится одним обращением к кешу:
+    граф не строится и не сжимается заново.
+    """
+    digest = trace_digest(statistic_data, docs_data)
+    bodies = get_cached_graph(digest)
+    if bodies is not None:
+        return digest, bodies, True
+    compact, xs, ys = build_graph(statistic_data, docs_data)
+    bodies = encode_payload(graph_payload(compact, xs, ys, digest))
+    cache.set(
+        GRAPH_KEY.format(digest=digest),
+        bodies,
+        core.blog_settings.GRAPH_CACHE_TIMEOUT
+    )
+    _cache_index(digest, compact, xs, ys)
+    return digest, bodies, False
@@ -0,0 +1,121 @@
+from array import array
+
+from .compact_graph import CompactGraph
+
+LAYOUT_WIDTH = 800
+"""Ширина области отображения графа, в пикселях."""
+
+STAGE_HEIGHT = 150
+"""Расстояние между рядами этапов, в пикселях."""
+
+LAYOUT_SWEEPS = 2
+"""Количество проходов барицентрического упорядочивания (вниз и вверх)."""
+
+
+def _stage_rows(compact):
+    """Возвращает для каждого узла номер ряда (этапа) или -1.
+
+    Если имя этапа встречается в stage_order несколько раз, узлы
+    попадают в последний из рядов, как в calculate_node_positions.
+    """
+    row_by_stage = array('i', [-1]) * len(compact.stage_names)
+    for row, stage in enumerate(compact.stage_order):
+        row_by_stage[stage] = row
+    return array('i', (row_by_stage[stage] for stage in compact.node_stage))
+
+
+def _reorder(rows, place, size, csr):
+    """Упорядочивает узлы каждого ряда по барицентру соседей из csr.
+
+    Барицентр — среднее относительных позиций соседей в их рядах;
+    узел без соседей сохраняет свою позицию. Сортировка устойчива,
+    поэтому при равных барицентрах сохраняется прежний порядок.
+    """
+    indptr, indices = csr
+    for row in rows:
+        def barycenter(node):
+            start, end = indptr[node], indptr[node + 1]
+            if start == end:
+                return (place[node] + 0.5) / size[node]
+            total = 0.0
+            for neighbour in indices[start:end]:
+                total += (place[neighbour] + 0.5) / size[neighbour]
+            return total / (end - start)
+
+        row.sort(key=barycenter)
+        for position, node in enumerate(row):
+            place[node] = position
+
+
+def layered_layout(
+    compact,
+    stage_height=STAGE_HEIGHT,
+    width=LAYOUT_WIDTH,
+    sweeps=LAYOUT_SWEEPS
+):
+    """
+    Рассчитывает координаты узлов графа по рядам этапов
+
+    Узлы одного этапа располагаются в одном ряду; порядок внутри ряда
+    выбирается барицентрическими проходами вниз (по предшественникам)
+    и вверх (по последователям), что уменьшает число пересечений рёбер.
+    Каждый проход линеен по числу рёбер, сортировка — по числу узлов ряда.
+
+    Args:
+        compact: CompactGraph.
+        stage_height: расстояние между рядами.
+        width: ширина ряда.
+        sweeps: количество пар проходов вниз и вверх.
+
+    Returns:
+        Кортеж (rows, xs, ys): rows — списки номеров узлов по рядам
+        в итоговом порядке, xs и ys — массивы координат, индексируемые
+        номером узла (у узлов вне stage_order координаты равны нулю).
+    """
+    node_row = _stage_rows(compact)
+    rows = [[] for _ in compact.stage_order]
+    for node, row in enumerate(node_row):
+        if row >= 0:
+            rows[row].append(node)
+
+    place = array('i', [0]) * compact.node_count
+    size = array('i', [1]) * compact.node_count
+    for row in rows:
+        for position, node in enumerate(row):
+            place[node] = position
+            size[node] = len(row)
+
+    if compact.edge_count:
+        in_csr, out_csr = compact.in_csr(), compact.out_csr()
+        for _ in range(sweeps):
+            _reorder(rows[1:], place, size, in_csr)
+            _reorder(rows[-2::-1], place, size, out_csr)
+
+    xs = array('d', [0.0]) * compact.node_count
+    ys = array('d', [0.0]) * compact.node_count
+    half_width = width / 2
+    for row_index, row in enumerate(rows):
+        x_spacing = width / max(len(row), 1)
+        y = row_index * stage_height
+        for position, node in enumerate(row):
+            xs[node] = position * x_spacing - half_width
+            ys[node] = y
+    return rows, xs, ys
+
+
+def position_nodes(graph_data, stage_height=STAGE_HEIGHT, width=LAYOUT_WIDTH):
+    """
+    Рассчитывает позиции узлов графа в формате build_document_traversal
+
+    В отличие от calculate_node_positions не изменяет узлы graph_data:
+    возвращает их копии с координатами x и y, по рядам и в порядке,
+    уменьшающем пересечения рёбер.
+    """
+    compact = CompactGraph.from_dict(graph_data)
+    rows, xs, ys = layered_layout(compact, stage_height, width)
+    nodes = list(graph_data['nodes'].values())
+    return [
+        {**nodes[node], 'x': xs[node], 'y': ys[node]}
+        for row in rows
+        for node in row
+    ]
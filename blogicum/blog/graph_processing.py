@@ -1,67 +1,153 @@
+TRAVERSAL_STATE_VERSION = 1
+"""Версия формата сохранённого состояния DocumentTraversalBuilder."""
 
 
-def build_document_traversal(statistic_data, docs_data):
+class DocumentTraversalBuilder:
     """
-    Строит полный граф трассировки документов через все этапы
+    Пошагово строит граф трассировки документов по мере выполнения этапов
+
+    Этапы передаются по одному в add_stage, который возвращает приращение
+    графа: новые узлы и рёбра этапа. Между этапами хранится только индекс
+    «id документа -> этапы» и ключи узлов, а не сами узлы и рёбра, поэтому
+    память не растёт с числом рёбер. Состояние сохраняется в get_state
+    (JSON-совместимый словарь) и восстанавливается в from_state.
     """
-    graph = {
-        'nodes': {},
-        'edges': [],
-        'stage_order': []
-    }
-    
-    # Собираем все уникальные документы и их появление на этапах
-    for stage_data in statistic_data:
+
+    def __init__(self, docs_data=None):
+        self.docs_data = docs_data if docs_data is not None else {}
+        self.stage_order = []
+        self.stages_by_doc = {}
+        self.node_keys = set()
+
+    def add_stage(self, stage_data):
+        """
+        Добавляет этап и возвращает приращение графа
+
+        Приращение — словарь с ключами stage, stage_index, nodes (новые
+        узлы в формате graph['nodes']) и edges (новые рёбра).
+        """
+        stage_idx = len(self.stage_order)
         stage_name = stage_data['stage']
-        graph['stage_order'].append(stage_name)
-        
+        self.stage_order.append(stage_name)
+        delta = {
+            'stage': stage_name,
+            'stage_index': stage_idx,
+            'nodes': {},
+            'edges': []
+        }
+
         for doc in stage_data['processed_documents']:
             doc_id = doc['id']
             node_key = f"{stage_name}_{doc_id}"
-            
+
             # Добавляем узел, если его еще нет
-            if node_key not in graph['nodes']:
-                graph['nodes'][node_key] = {
+            if node_key not in self.node_keys:
+                self.node_keys.add(node_key)
+                delta['nodes'][node_key] = {
                     'id': node_key,
                     'original_id': doc_id,
                     'stage': stage_name,
                     'refs': doc.get('ref', []),
-                    'info': docs_data.get(doc_id, {})
+                    'info': self.docs_data.get(doc_id, {})
                 }
-    
-    # Строим связи между документами
-    for stage_idx, stage_data in enumerate(statistic_data):
-        stage_name = stage_data['stage']
-        
-        for doc in stage_data['processed_documents']:
-            doc_id = doc['id']
-            current_node_key = f"{stage_name}_{doc_id}"
-            
-            # Ищем источники на предыдущих этапах
+
+            # Ребро идёт от каждого предыдущего этапа, на котором
+            # встречается документ-источник
             for ref_doc_id in doc.get('ref', []):
-                if ref_doc_id:
-                    # Ищем на каком этапе появился этот документ
-                    for prev_stage_idx in range(stage_idx):
-                        prev_stage = statistic_data[prev_stage_idx]
-                        for prev_doc in prev_stage['processed_documents']:
-                            if prev_doc['id'] == ref_doc_id:
-                                prev_node_key = f"{prev_stage['stage']}_{ref_doc_id}"
-                                
-                                # Добавляем ребро
-                                edge_id = f"{prev_node_key}_{current_node_key}"
-                                graph['edges'].append({
-                                    'id': edge_id,
-                                    'from': prev_node_key,
-                                    'to': current_node_key
-                                })
-                                break
-    
+                if not ref_doc_id:
+                    continue
+                for prev_stage_idx in self.stages_by_doc.get(ref_doc_id, ()):
+                    if prev_stage_idx >= stage_idx:
+                        break
+                    prev_node_key = (
+                        f"{self.stage_order[prev_stage_idx]}_{ref_doc_id}"
+                    )
+                    delta['edges'].append({
+                        'id': f"{prev_node_key}_{node_key}",
+                        'from': prev_node_key,
+                        'to': node_key
+                    })
+
+            doc_stages = self.stages_by_doc.setdefault(doc_id, [])
+            if not doc_stages or doc_stages[-1] != stage_idx:
+                doc_stages.append(stage_idx)
+
+        return delta
+
+    def add_stages(self, stages):
+        """Добавляет этапы из итерируемого источника, выдавая приращения."""
+        for stage_data in stages:
+            yield self.add_stage(stage_data)
+
+    def get_state(self):
+        """Возвращает состояние построителя в JSON-совместимом виде."""
+        return {
+            'version': TRAVERSAL_STATE_VERSION,
+            'stage_order': list(self.stage_order),
+            # Пары, а не словарь: id документов не обязательно строки
+            'stages_by_doc': [
+                [doc_id, list(doc_stages)]
+                for doc_id, doc_stages in self.stages_by_doc.items()
+            ],
+            'node_keys': sorted(self.node_keys),
+        }
+
+    @classmethod
+    def from_state(cls, state, docs_data=None):
+        """Восстанавливает построитель из состояния get_state."""
+        if state.get('version') != TRAVERSAL_STATE_VERSION:
+            raise ValueError(
+                f"Неподдерживаемая версия состояния: {state.get('version')}"
+            )
+        builder = cls(docs_data)
+        builder.stage_order = list(state['stage_order'])
+        builder.stages_by_doc = {
+            doc_id: list(doc_stages)
+            for doc_id, doc_stages in state['stages_by_doc']
+        }
+        builder.node_keys = set(state['node_keys'])
+        return builder
+
+
+def empty_graph():
+    """Возвращает пустой граф трассировки."""
+    return {
+        'nodes': {},
+        'edges': [],
+        'stage_order': []
+    }
+
+
+def apply_delta(graph, delta):
+    """Добавляет к графу приращение DocumentTraversalBuilder.add_stage."""
+    graph['stage_order'].append(delta['stage'])
+    graph['nodes'].update(delta['nodes'])
+    graph['edges'].extend(delta['edges'])
+    return graph
+
+
+def build_document_traversal(statistic_data, docs_data):
+    """
+    Строит полный граф трассировки документов через все этапы
+
+    Этапы, на которых встречается каждый документ, индексируются
+    по ходу построения, поэтому граф строится за время, линейное
+    по числу документов, ссылок и рёбер.
+    """
+    builder = DocumentTraversalBuilder(docs_data)
+    graph = empty_graph()
+    for delta in builder.add_stages(statistic_data):
+        apply_delta(graph, delta)
     return graph
 
 
 def calculate_node_positions(graph_data, stage_height=150):
     """
     Рассчитывает позиции узлов для иерархического отображения
+
+    Узлы располагаются в порядке добавления и изменяются на месте.
+    Для больших графов используйте graph_layout.position_nodes: он
+    упорядочивает узлы ряда, уменьшая пересечения рёбер.
     """
     # Группируем узлы по этапам
     nodes_by_stage = {}
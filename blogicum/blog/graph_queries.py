@@ -0,0 +1,115 @@
+from collections import deque
+
+
+def _traverse(csr, start_nodes, depth=None):
+    """Обход в ширину по смежности csr от узлов start_nodes.
+
+    Возвращает достигнутые узлы (без стартовых) в порядке обхода.
+    Время пропорционально числу найденных узлов и их рёбер.
+    """
+    indptr, indices = csr
+    seen = set(start_nodes)
+    found = []
+    queue = deque((node, 0) for node in seen)
+    while queue:
+        node, level = queue.popleft()
+        if depth is not None and level >= depth:
+            continue
+        for neighbour in indices[indptr[node]:indptr[node + 1]]:
+            if neighbour not in seen:
+                seen.add(neighbour)
+                found.append(neighbour)
+                queue.append((neighbour, level + 1))
+    return found
+
+
+def ancestors(compact, start_nodes, depth=None):
+    """Узлы, от которых по рёбрам графа достижимы узлы start_nodes.
+
+    depth ограничивает число шагов назад по рёбрам.
+    """
+    return _traverse(compact.in_csr(), start_nodes, depth)
+
+
+def descendants(compact, start_nodes, depth=None):
+    """Узлы, достижимые по рёбрам графа из узлов start_nodes."""
+    return _traverse(compact.out_csr(), start_nodes, depth)
+
+
+def doc_lineage(compact, doc_id, direction='both', depth=None):
+    """Узлы документа doc_id вместе с предками и/или потомками.
+
+    Args:
+        compact: CompactGraph.
+        doc_id: id документа; учитываются его узлы на всех этапах.
+        direction: 'ancestors', 'descendants' или 'both'.
+        depth: ограничение числа шагов по рёбрам.
+
+    Returns:
+        Отсортированный список номеров узлов.
+    """
+    if direction not in ('ancestors', 'descendants', 'both'):
+        raise ValueError(f'Неизвестное направление: {direction}')
+    start_nodes = compact.nodes_of_doc(doc_id)
+    nodes = set(start_nodes)
+    if direction in ('ancestors', 'both'):
+        nodes.update(ancestors(compact, start_nodes, depth))
+    if direction in ('descendants', 'both'):
+        nodes.update(descendants(compact, start_nodes, depth))
+    return sorted(nodes)
+
+
+def top_referenced(compact, k):
+    """Возвращает k самых цитируемых узлов каждого этапа.
+
+    Результат — словарь {имя этапа: [номера узлов]}. Ранжирование
+    строится CompactGraph.build_indexes и хранится вместе с графом
+    в кеше, поэтому время пропорционально размеру результата.
+    """
+    return {
+        compact.stage_names[stage]: nodes[:k]
+        for stage, nodes in compact.ranked_by_stage().items()
+    }
+
+
+def collapse_single_parent(compact):
+    """Сворачивает узлы с единственным родителем в их родителя.
+
+    Каждый узел, в который входит ровно одно ребро, объединяется
+    с представителем своего родителя; представители — узлы без входящих
+    рёбер или с несколькими. Рёбра между узлами одной группы исчезают,
+    рёбра между группами объединяются.
+
+    Returns:
+        Кортеж (nodes, edges, collapsed): номера узлов-представителей,
+        пары номеров (из, в) рёбер между ними и словарь
+        {представитель: число свёрнутых в него узлов}.
+    """
+    in_indptr, in_indices = compact.in_csr()
+    representative = {}
+    for node in range(compact.node_count):
+        chain = []
+        current = node
+        while current not in representative:
+            if in_indptr[current + 1] - in_indptr[current] != 1:
+                representative[current] = current
+                break
+            chain.append(current)
+            # Пока узел ждёт представителя, он помечен самим собой: так
+            # цикл из узлов с одним родителем не зациклит обход.
+            representative[current] = current
+            current = in_indices[in_indptr[current]]
+        for member in chain:
+            representative[member] = representative[current]
+
+    nodes = sorted(set(representative.values()))
+    collapsed = dict.fromkeys(nodes, 0)
+    for node, rep in representative.items():
+        if node != rep:
+            collapsed[rep] += 1
+    edges = list(dict.fromkeys(
+        (representative[source], representative[target])
+        for source, target in zip(compact.edge_from, compact.edge_to)
+        if representative[source] != representative[target]
+    ))
+    return nodes, edges, collapsed
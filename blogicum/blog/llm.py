@@ -0,0 +1,331 @@
+import logging
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+
+import core.blog_settings
+
+from .semaphore import DEFAULT_TENANT
+
+
+class CompletionError(Exception):
+    """Запрос к LLM завершился ошибкой, которую имеет смысл повторить."""
+
+
+class CompletionTimeout(CompletionError):
+    """Запрос к LLM не уложился в отведённое время."""
+
+
+class CompletionBackend:
+    """Интерфейс бэкенда LLM.
+
+    Метод complete выполняет один запрос и должен уложиться в timeout
+    секунд, иначе — выбросить CompletionTimeout. Бэкенд вызывается
+    из нескольких потоков одновременно.
+    """
+
+    def complete(self, prompt, request_id, timeout):
+        raise NotImplementedError
+
+    def complete_batch(self, items, timeout):
+        """Выполняет запросы items — пары (prompt, id) — одним вызовом.
+
+        Возвращает результаты в порядке запросов. Бэкенды, умеющие
+        пакетные запросы, переопределяют метод; по умолчанию запросы
+        выполняются по очереди.
+        """
+        return [
+            self.complete(prompt, request_id, timeout)
+            for prompt, request_id in items
+        ]
+
+
+class StubBackend(CompletionBackend):
+    """Локальная заглушка LLM для разработки и тестов.
+
+    Имитирует запрос длительностью delay секунд. Первые fail_times
+    вызовов завершаются CompletionError, что позволяет проверять повторы.
+    """
+
+    def __init__(self, delay=0, fail_times=0):
+        self.delay = delay
+        self.fail_times = fail_times
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def _call(self, request_id, timeout):
+        with self._lock:
+            self.calls += 1
+            failed = self.calls <= self.fail_times
+        if failed:
+            raise CompletionError(f'[{request_id}]: stub failure')
+        if timeout is not None and self.delay > timeout:
+            time.sleep(timeout)
+            raise CompletionTimeout(f'[{request_id}]: timed out')
+        time.sleep(self.delay)
+        return time.time()
+
+    def complete(self, prompt, request_id, timeout):
+        return {
+            'id': request_id,
+            'timestamp': self._call(request_id, timeout)
+        }
+
+    def complete_batch(self, items, timeout):
+        """Пакет занимает столько же времени, сколько один запрос."""
+        timestamp = self._call(items[0][1], timeout)
+        return [
+            {'id': request_id, 'timestamp': timestamp}
+            for _, request_id in items
+        ]
+
+
+class CompletionPool:
+    """Пул запросов к LLM с ограничением параллельности.
+
+    Одновременно выполняется не больше concurrency запросов этого пула;
+    limiter дополнительно ограничивает параллельность между процессами.
+    Он вызывается с именем арендатора и возвращает контекстный менеджер
+    (например, аренду LeaseSemaphore.acquire). Ограничитель занимается
+    только на время попытки запроса, а не на паузы между повторами.
+
+    Таймаут попытки соблюдает сам пул: каждый вызов бэкенда выполняется
+    в собственном потоке, и если он не уложился в timeout, слот пула
+    и ограничитель освобождаются, а попытка завершается
+    CompletionTimeout, даже если бэкенд timeout игнорирует. Зависший
+    вызов занимает только свой поток и не мешает следующим.
+
+    Args:
+        backend: CompletionBackend.
+        concurrency: максимальное число одновременных запросов.
+        timeout: время на одну попытку, в секундах.
+        retries: число повторов после ошибки или таймаута.
+        backoff: пауза перед первым повтором; удваивается с каждым.
+        limiter: limiter(tenant) — контекстный менеджер общего ограничения.
+    """
+
+    def __init__(
+        self,
+        backend,
+        concurrency=core.blog_settings.LLM_CONCURRENCY,
+        timeout=core.blog_settings.LLM_TIMEOUT,
+        retries=core.blog_settings.LLM_RETRIES,
+        backoff=core.blog_settings.LLM_RETRY_BACKOFF,
+        limiter=None
+    ):
+        if concurrency < 1:
+            raise ValueError('concurrency must be positive')
+        self.backend = backend
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.limiter = limiter
+        self._slots = threading.BoundedSemaphore(concurrency)
+        self._executor = ThreadPoolExecutor(
+            max_workers=concurrency, thread_name_prefix='llm'
+        )
+
+    def _call(self, call, label):
+        # Вызов не ставится в очередь общего исполнителя: иначе вызовы,
+        # зависшие дольше timeout, заняли бы все его потоки, и новые
+        # попытки истекали бы в очереди, так и не дойдя до бэкенда.
+        future = Future()
+
+        def run():
+            future.set_running_or_notify_cancel()
+            try:
+                future.set_result(call())
+            except BaseException as error:
+                future.set_exception(error)
+
+        threading.Thread(target=run, name='llm-call', daemon=True).start()
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeout:
+            # Зависший вызов нельзя прервать, но слот и аренда
+            # освобождаются.
+            raise CompletionTimeout(f'[{label}]: timed out')
+
+    def _attempt(self, call, label, tenant):
+        with self._slots:
+            if self.limiter is None:
+                return self._call(call, label)
+            with self.limiter(tenant):
+                return self._call(call, label)
+
+    def _with_retries(self, call, label, tenant):
+        delay = self.backoff
+        for attempt in range(self.retries + 1):
+            try:
+                logging.info(f"[{label}]: attempt {attempt + 1}")
+                return self._attempt(call, label, tenant)
+            except CompletionError as error:
+                if attempt == self.retries:
+                    raise
+                logging.warning(f"[{label}]: {error!r}, retrying")
+                time.sleep(delay)
+                delay *= 2
+
+    def complete(self, prompt, request_id, tenant=DEFAULT_TENANT):
+        """Выполняет запрос в текущем потоке, повторяя его при ошибках."""
+        return self._with_retries(
+            lambda: self.backend.complete(prompt, request_id, self.timeout),
+            request_id,
+            tenant
+        )
+
+    def complete_batch(self, items, tenant=DEFAULT_TENANT):
+        """Выполняет пакет запросов items — пар (prompt, id).
+
+        Пакет целиком занимает один слот пула и одну аренду limiter
+        и повторяется целиком при ошибке.
+        """
+        items = list(items)
+        return self._with_retries(
+            lambda: self.backend.complete_batch(items, self.timeout),
+            f'batch of {len(items)}, first {items[0][1]}',
+            tenant
+        )
+
+    def submit(self, prompt, request_id, tenant=DEFAULT_TENANT):
+        """Ставит запрос в пул и возвращает concurrent.futures.Future."""
+        return self._executor.submit(
+            self.complete, prompt, request_id, tenant
+        )
+
+    def submit_batch(self, items, tenant=DEFAULT_TENANT):
+        """Ставит пакет запросов в пул и возвращает Future со списком."""
+        return self._executor.submit(self.complete_batch, items, tenant)
+
+    def complete_many(self, prompts):
+        """Выполняет запросы параллельно; prompts — пары (prompt, id).
+
+        Результаты возвращаются в порядке запросов.
+        """
+        futures = [
+            self.submit(prompt, request_id) for prompt, request_id in prompts
+        ]
+        return [future.result() for future in futures]
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True)
+
+
+class CompletionBatcher:
+    """Собирает одновременные запросы к LLM в пакеты.
+
+    Запрос не отправляется сразу, а ждёт попутчиков того же арендатора
+    не дольше max_wait секунд; пакет из max_size запросов уходит
+    немедленно. Пакет выполняется одним вызовом бэкенда через
+    CompletionPool.complete_batch, а результаты раздаются по Future
+    отдельных запросов. Под всплеском нагрузки это уменьшает число
+    вызовов LLM и аренд семафора.
+
+    Пакеты собираются внутри процесса, поэтому выигрыш есть, когда
+    один воркер выполняет несколько задач одновременно (пулы threads,
+    gevent, eventlet).
+    """
+
+    def __init__(
+        self,
+        pool,
+        max_size=core.blog_settings.LLM_BATCH_SIZE,
+        max_wait=core.blog_settings.LLM_BATCH_WAIT
+    ):
+        if max_size < 1:
+            raise ValueError('max_size must be positive')
+        self.pool = pool
+        self.max_size = max_size
+        self.max_wait = max_wait
+        self.batches = 0
+        self._pending = {}
+        self._deadlines = {}
+        self._condition = threading.Condition()
+        self._closed = False
+        self._thread = None
+
+    def _start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self._run, name='llm-batcher', daemon=True
+            )
+            self._thread.start()
+
+    def _run(self):
+        with self._condition:
+            while not self._closed:
+                if not self._deadlines:
+                    self._condition.wait()
+                    continue
+                tenant = min(self._deadlines, key=self._deadlines.get)
+                remaining = self._deadlines[tenant] - time.monotonic()
+                if remaining > 0:
+                    self._condition.wait(remaining)
+                    continue
+                self._flush(tenant)
+
+    def _flush(self, tenant):
+        """Отправляет накопленный пакет арендатора; вызывается под lock."""
+        self._deadlines.pop(tenant, None)
+        # Отменённые до отправки запросы в пакет не попадают; остальные
+        # с этого момента выполняются, и отменить их уже нельзя.
+        entries = [
+            entry for entry in self._pending.pop(tenant)
+            if entry[2].set_running_or_notify_cancel()
+        ]
+        if not entries:
+            return
+        self.batches += 1
+        batch = self.pool.submit_batch(
+            [(prompt, request_id) for prompt, request_id, _ in entries],
+            tenant
+        )
+
+        def fan_out(batch):
+            try:
+                results = batch.result()
+                if len(results) != len(entries):
+                    raise CompletionError(
+                        f'batch of {len(entries)}: '
+                        f'backend returned {len(results)} results'
+                    )
+            except Exception as error:
+                for _, _, future in entries:
+                    future.set_exception(error)
+                return
+            for (_, _, future), result in zip(entries, results):
+                future.set_result(result)
+
+        batch.add_done_callback(fan_out)
+
+    def submit(self, prompt, request_id, tenant=DEFAULT_TENANT):
+        """Добавляет запрос в пакет и возвращает Future его результата."""
+        future = Future()
+        with self._condition:
+            if self._closed:
+                raise RuntimeError('batcher is shut down')
+            entries = self._pending.setdefault(tenant, [])
+            entries.append((prompt, request_id, future))
+            if len(entries) >= self.max_size:
+                self._flush(tenant)
+            elif len(entries) == 1:
+                self._deadlines[tenant] = time.monotonic() + self.max_wait
+                self._start()
+                self._condition.notify()
+        return future
+
+    def complete(self, prompt, request_id, tenant=DEFAULT_TENANT):
+        """Выполняет запрос в составе пакета и ждёт его результата."""
+        return self.submit(prompt, request_id, tenant).result()
+
+    def shutdown(self):
+        """Отправляет накопленные пакеты и останавливает сборку."""
+        with self._condition:
+            self._closed = True
+            for tenant in list(self._pending):
+                self._flush(tenant)
+            self._condition.notify()
+        if self._thread is not None:
+            self._thread.join()
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+
+from blog.models import Post, make_excerpt
+
+
+class Command(BaseCommand):
+    """Заполняет анонсы публикаций по их текстам."""
+
+    help = 'Пересчитывает поле excerpt у всех постов.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Количество постов, обновляемых одним запросом.'
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        batch = []
+        updated = 0
+        posts = Post.objects.only('id', 'text').iterator(batch_size)
+        for post in posts:
+            post.excerpt = make_excerpt(post.text)
+            batch.append(post)
+            if len(batch) == batch_size:
+                updated += Post.objects.bulk_update(batch, ('excerpt',))
+                batch = []
+        updated += Post.objects.bulk_update(batch, ('excerpt',))
+        self.stdout.write(
+            self.style.SUCCESS(f'Обновлено анонсов: {updated}')
+        )
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from blog.models import Comment, Post
+
+
+class Command(BaseCommand):
+    """Пересчитывает денормализованный счётчик комментариев постов."""
+
+    help = 'Пересчитывает поле comment_count у всех постов.'
+
+    def handle(self, *args, **options):
+        comments = (
+            Comment.objects.filter(post=OuterRef('pk'))
+            .order_by()
+            .values('post')
+            .annotate(total=Count('pk'))
+            .values('total')
+        )
+        updated = Post.objects.update(
+            comment_count=Coalesce(Subquery(comments), 0)
+        )
+        self.stdout.write(
+            self.style.SUCCESS(f'Пересчитано постов: {updated}')
+        )
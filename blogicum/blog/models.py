@@ -1,14 +1,22 @@
 from django.contrib.auth import get_user_model
 from django.db import models
+from django.utils import timezone
+from django.utils.text import Truncator
 
 from .validators import title_without_dot
 import core.blog_settings
-from core.models import CoreEntity
+from core.models import CoreEntity, TrackedEntity
 
 User = get_user_model()
 
 
-class Category(CoreEntity):
+def make_excerpt(text):
+    """Формирует анонс публикации из первых слов текста."""
+    excerpt = Truncator(text).words(core.blog_settings.EXCERPT_WORDS)
+    return Truncator(excerpt).chars(core.blog_settings.CHARFIELD_MAX_LENGTH)
+
+
+class Category(TrackedEntity):
     title = models.CharField(
         max_length=core.blog_settings.CHARFIELD_MAX_LENGTH,
         verbose_name='Заголовок'
@@ -34,7 +42,7 @@ class Category(CoreEntity):
         return self.title
 
 
-class Location(CoreEntity):
+class Location(TrackedEntity):
     name = models.CharField(
         max_length=core.blog_settings.CHARFIELD_MAX_LENGTH,
         verbose_name='Название места'
@@ -48,13 +56,46 @@ class Location(CoreEntity):
         return self.name
 
 
-class Post(CoreEntity):
+class Tag(TrackedEntity):
+    class Status(models.TextChoices):
+        ACTIVE = 'active', 'Активен'
+        INACTIVE = 'inactive', 'Неактивен'
+
+    title = models.CharField(
+        max_length=core.blog_settings.CHARFIELD_MAX_LENGTH,
+        verbose_name='Название'
+    )
+    status = models.CharField(
+        max_length=core.blog_settings.TAG_STATUS_LENGTH,
+        choices=Status.choices,
+        default=Status.ACTIVE,
+        verbose_name='Статус'
+    )
+
+    class Meta:
+        verbose_name = 'тег'
+        verbose_name_plural = 'Теги'
+        indexes = (
+            models.Index(fields=('status', 'id'), name='tag_status_idx'),
+        )
+
+    def __str__(self):
+        return self.title
+
+
+class Post(TrackedEntity):
     title = models.CharField(
         max_length=core.blog_settings.CHARFIELD_MAX_LENGTH,
         verbose_name='Заголовок',
         validators=(title_without_dot,)
     )
     text = models.TextField(verbose_name='Текст')
+    excerpt = models.CharField(
+        max_length=core.blog_settings.CHARFIELD_MAX_LENGTH,
+        blank=True,
+        editable=False,
+        verbose_name='Анонс'
+    )
     image = models.ImageField('Фото', upload_to='post_images', blank=True)
     pub_date = models.DateTimeField(
         verbose_name='Дата и время публикации',
@@ -63,6 +104,15 @@ class Post(CoreEntity):
             'отложенные публикации.'
         )
     )
+    is_visible = models.BooleanField(
+        default=False,
+        editable=False,
+        verbose_name='Дата публикации наступила',
+        help_text=(
+            'Выставляется при сохранении поста и периодической задачей '
+            'публикации отложенных постов.'
+        )
+    )
     author = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
@@ -83,14 +133,111 @@ class Post(CoreEntity):
         verbose_name='Категория',
         related_name='posts'
     )
+    tags = models.ManyToManyField(
+        Tag,
+        blank=True,
+        verbose_name='Теги',
+        related_name='posts'
+    )
+    comment_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Количество комментариев'
+    )
 
     class Meta:
         verbose_name = 'публикация'
         verbose_name_plural = 'Публикации'
+        indexes = (
+            models.Index(
+                fields=('-pub_date', '-id'),
+                condition=models.Q(is_published=True, is_visible=True),
+                name='post_visible_feed_idx',
+            ),
+            models.Index(
+                fields=('author', '-pub_date', '-id'),
+                name='post_author_feed_idx',
+            ),
+            models.Index(
+                fields=('category', '-pub_date', '-id'),
+                name='post_category_feed_idx',
+            ),
+            models.Index(
+                fields=('updated_at', 'id'),
+                name='post_updated_idx',
+            ),
+        )
 
     def __str__(self):
         return self.title
 
+    def fill_derived_fields(self):
+        """Пересчитывает поля, вычисляемые из других полей поста.
+
+        Нужен и при save(), и перед bulk_create/bulk_update, которые
+        save() не вызывают. Возвращает имена пересчитанных полей.
+        """
+        deferred = self.get_deferred_fields()
+        derived = set()
+        if 'pub_date' not in deferred:
+            self.is_visible = self.pub_date <= timezone.now()
+            derived.add('is_visible')
+        if 'text' not in deferred:
+            self.excerpt = make_excerpt(self.text)
+            derived.add('excerpt')
+        return derived
+
+    def save(self, *args, **kwargs):
+        derived = self.fill_derived_fields()
+        update_fields = kwargs.get('update_fields')
+        if (
+            update_fields is None
+            and not self._state.adding
+            and self.pk is not None
+            and not kwargs.get('force_insert')
+        ):
+            # comment_count меняется только через F() в signals.py:
+            # полное сохранение загруженного ранее поста не должно
+            # затирать комментарии, созданные после загрузки.
+            deferred = self.get_deferred_fields()
+            update_fields = {
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.attname not in deferred
+                and field.name != 'comment_count'
+            }
+        if update_fields:
+            # updated_at сохраняется всегда: по нему лента изменений
+            # находит отредактированные посты.
+            sources = {'is_visible': 'pub_date', 'excerpt': 'text'}
+            kwargs['update_fields'] = {*update_fields, 'updated_at'} | {
+                name for name in derived if sources[name] in update_fields
+            }
+        super().save(*args, **kwargs)
+
+
+class PostTombstone(models.Model):
+    """Отметка об удалении поста для инкрементальной синхронизации."""
+
+    post_id = models.BigIntegerField(verbose_name='id удалённого поста')
+    deleted_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Удалено'
+    )
+
+    class Meta:
+        verbose_name = 'удалённая публикация'
+        verbose_name_plural = 'Удалённые публикации'
+        indexes = (
+            models.Index(
+                fields=('deleted_at', 'id'),
+                name='post_tombstone_deleted_idx',
+            ),
+        )
+
+    def __str__(self):
+        return str(self.post_id)
+
 
 class Comment(CoreEntity):
     text = models.TextField(verbose_name='Текст комментария')
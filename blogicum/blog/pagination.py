@@ -0,0 +1,126 @@
+import base64
+import binascii
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.pagination import CursorPagination
+
+CURSOR_SEPARATOR = '|'
+"""Разделитель полей внутри курсора."""
+
+FORWARD = 'n'
+"""Направление курсора: следующая страница."""
+
+BACKWARD = 'p'
+"""Направление курсора: предыдущая страница."""
+
+
+class InvalidCursor(ValueError):
+    """Курсор не удалось разобрать."""
+
+
+def encode_cursor(direction, obj, key_field='pub_date'):
+    """Кодирует позицию объекта в ленте в непрозрачную строку для URL."""
+    raw = CURSOR_SEPARATOR.join(
+        (direction, getattr(obj, key_field).isoformat(), str(obj.pk))
+    )
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Разбирает курсор на направление, значение ключа и id объекта."""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode()).decode()
+        direction, value, pk = raw.split(CURSOR_SEPARATOR)
+        value = parse_datetime(value)
+        pk = int(pk)
+    except (binascii.Error, UnicodeDecodeError, ValueError) as error:
+        raise InvalidCursor(cursor) from error
+    if direction not in (FORWARD, BACKWARD) or value is None:
+        raise InvalidCursor(cursor)
+    return direction, value, pk
+
+
+class CursorPage:
+    """Страница ленты, выбранная по ключу (дата, id).
+
+    Повторяет ту часть интерфейса django.core.paginator.Page, которую
+    используют шаблоны ленты, но не выполняет COUNT(*) и OFFSET:
+    каждая страница — это один запрос с LIMIT по индексируемому ключу.
+    По умолчанию лента упорядочена по pub_date «от новых к старым».
+    """
+
+    cursor_mode = True
+
+    def __init__(
+        self,
+        queryset,
+        per_page,
+        cursor=None,
+        key_field='pub_date',
+        descending=True
+    ):
+        self.key_field = key_field
+        direction, value, pk = (
+            decode_cursor(cursor) if cursor else (FORWARD, None, None)
+        )
+        # Запрос назад по ленте идёт в обратном порядке ключа.
+        reverse = descending == (direction == FORWARD)
+        after = 'lt' if reverse else 'gt'
+        if value is not None:
+            queryset = queryset.filter(
+                Q(**{f'{key_field}__{after}': value})
+                | Q(**{key_field: value, f'pk__{after}': pk})
+            )
+        prefix = '-' if reverse else ''
+        queryset = queryset.order_by(f'{prefix}{key_field}', f'{prefix}pk')
+
+        object_list = list(queryset[:per_page + 1])
+        has_more = len(object_list) > per_page
+        object_list = object_list[:per_page]
+
+        if direction == FORWARD:
+            self.has_next_page = has_more
+            self.has_previous_page = value is not None
+        else:
+            object_list.reverse()
+            self.has_next_page = True
+            self.has_previous_page = has_more
+        self.object_list = object_list
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self.has_next_page and bool(self.object_list)
+
+    def has_previous(self):
+        return self.has_previous_page and bool(self.object_list)
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+    @property
+    def next_cursor(self):
+        if not self.has_next():
+            return None
+        return encode_cursor(FORWARD, self.object_list[-1], self.key_field)
+
+    @property
+    def previous_cursor(self):
+        if not self.has_previous():
+            return None
+        return encode_cursor(BACKWARD, self.object_list[0], self.key_field)
+
+
+class PostCursorPagination(CursorPagination):
+    """Курсорная пагинация API публикаций по ключу (pub_date, id)."""
+
+    ordering = ('-pub_date', '-id')
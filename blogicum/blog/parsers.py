@@ -0,0 +1,27 @@
+import json
+
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+
+
+class NDJSONParser(BaseParser):
+    """Разбирает поток JSON-объектов, по одному в строке.
+
+    Возвращает генератор, поэтому строки читаются из запроса по мере
+    обработки, а не загружаются в память целиком.
+    """
+
+    media_type = 'application/x-ndjson'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        def items():
+            for number, line in enumerate(stream, start=1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except ValueError as error:
+                    raise ParseError(f'Строка {number}: {error}')
+
+        return items()
@@ -0,0 +1,423 @@
+import copy
+import json
+import logging
+import math
+import threading
+import time
+import uuid
+
+DEFAULT_TENANT = 'default'
+"""Арендатор, от имени которого выполняются запросы без явного указания."""
+
+
+class SemaphoreTimeout(Exception):
+    """Слот не удалось получить за отведённое время."""
+
+
+class LeaseExpired(Exception):
+    """Аренда истекла и была отозвана, слот уже мог достаться другому."""
+
+
+def new_state():
+    """Пустое состояние семафора."""
+    return {
+        'holders': {},
+        'waiters': [],
+        'metrics': {
+            'acquired': 0,
+            'released': 0,
+            'expired': 0,
+            'abandoned': 0,
+            'timeouts': 0,
+            'wait_total': 0.0,
+            'wait_max': 0.0,
+            'hold_total': 0.0,
+            'hold_max': 0.0,
+            'queue_depth_max': 0,
+        },
+    }
+
+
+class InMemoryBackend:
+    """Хранилище состояний семафоров в памяти процесса.
+
+    Состояние семафора — JSON-совместимый документ (new_state), который
+    меняется только внутри transaction. Бэкенд подходит для тестов
+    и локального запуска; clock позволяет подменить источник времени.
+    """
+
+    def __init__(self, clock=time.time):
+        self.clock = clock
+        self._states = {}
+        self._wakeups = {}
+        self._lock = threading.Lock()
+
+    def _wakeup(self, name, lease_id):
+        with self._lock:
+            return self._wakeups.setdefault(
+                (name, lease_id), threading.Event()
+            )
+
+    def transaction(self, name, func):
+        """Выполняет func(state, now) атомарно и сохраняет state.
+
+        Если func выбрасывает исключение, состояние не меняется.
+        """
+        with self._lock:
+            state = copy.deepcopy(self._states.get(name)) or new_state()
+            result = func(state, self.clock())
+            self._states[name] = state
+            return result
+
+    def notify(self, name, lease_ids, ttl):
+        """Будит ожидающих lease_ids; сигнал хранится до wait."""
+        for lease_id in lease_ids:
+            self._wakeup(name, lease_id).set()
+
+    def wait(self, name, lease_id, timeout):
+        """Ждёт сигнала для lease_id не дольше timeout секунд."""
+        wakeup = self._wakeup(name, lease_id)
+        woken = wakeup.wait(timeout)
+        wakeup.clear()
+        return woken
+
+    def forget(self, name, lease_id):
+        """Удаляет неполученный сигнал для lease_id."""
+        with self._lock:
+            self._wakeups.pop((name, lease_id), None)
+
+
+class RedisBackend:
+    """Хранилище состояний семафоров в Redis.
+
+    Транзакция читает документ под WATCH и записывает его в MULTI;
+    при конкурентном изменении redis-py повторяет её. Время берётся
+    с сервера Redis, чтобы часы воркеров не расходились. Сигналы
+    ожидающим передаются через списки: ожидающий блокируется в BLPOP
+    и не обращается к документу, пока его не разбудят.
+    """
+
+    def __init__(self, client, prefix='semaphore:'):
+        self.client = client
+        self.prefix = prefix
+
+    def _wakeup_key(self, name, lease_id):
+        return f'{self.prefix}{name}:wakeup:{lease_id}'
+
+    def transaction(self, name, func):
+        key = self.prefix + name
+
+        def run(pipe):
+            raw = pipe.get(key)
+            state = json.loads(raw) if raw else new_state()
+            seconds, microseconds = pipe.time()
+            result = func(state, seconds + microseconds / 1e6)
+            pipe.multi()
+            pipe.set(key, json.dumps(state))
+            return result
+
+        return self.client.transaction(run, key, value_from_callable=True)
+
+    def notify(self, name, lease_ids, ttl):
+        pipe = self.client.pipeline(transaction=False)
+        for lease_id in lease_ids:
+            key = self._wakeup_key(name, lease_id)
+            pipe.rpush(key, 1)
+            # Сигнал ожидающему, который уже ушёл, не живёт дольше ttl.
+            pipe.expire(key, max(1, math.ceil(ttl)))
+        pipe.execute()
+
+    def wait(self, name, lease_id, timeout):
+        key = self._wakeup_key(name, lease_id)
+        return self.client.blpop([key], timeout=timeout) is not None
+
+    def forget(self, name, lease_id):
+        self.client.delete(self._wakeup_key(name, lease_id))
+
+
+class Lease:
+    """Аренда слотов семафора; используется как контекстный менеджер.
+
+    Пока аренда не освобождена, её нужно продлевать через heartbeat
+    чаще, чем раз в ttl секунд; с auto_heartbeat это делает фоновый поток.
+    """
+
+    def __init__(self, semaphore, lease_id, tenant, weight, auto_heartbeat):
+        self.semaphore = semaphore
+        self.id = lease_id
+        self.tenant = tenant
+        self.weight = weight
+        self.released = False
+        self._stop = threading.Event()
+        self._heartbeat_thread = None
+        if auto_heartbeat:
+            self._heartbeat_thread = threading.Thread(
+                target=self._beat, name=f'lease-{lease_id}', daemon=True
+            )
+            self._heartbeat_thread.start()
+
+    def _beat(self):
+        while not self._stop.wait(self.semaphore.ttl / 3):
+            try:
+                self.heartbeat()
+            except LeaseExpired:
+                logging.warning(f"[{self.id}]: lease expired")
+                return
+
+    def heartbeat(self):
+        """Продлевает аренду на ttl секунд."""
+        self.semaphore._heartbeat(self.id)
+
+    def release(self):
+        """Освобождает слоты; возвращает False, если аренда уже истекла."""
+        self._stop.set()
+        if self._heartbeat_thread is not None:
+            self._heartbeat_thread.join()
+        if self.released:
+            return False
+        self.released = True
+        return self.semaphore._release(self.id)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.release()
+
+
+class LeaseSemaphore:
+    """Справедливый семафор со взвешенными арендами слотов.
+
+    capacity — общее число слотов. Запрос арендатора tenant занимает
+    weight слотов: по умолчанию weights.get(tenant, 1). tenant_limits
+    ограничивает число слотов, одновременно занятых одним арендатором.
+
+    Ожидающие обслуживаются в порядке очереди (FIFO): запрос, которому
+    не хватает свободных слотов, не обгоняют более поздние, поэтому
+    тяжёлые запросы не голодают. Обгонять можно только запросы
+    арендаторов, упёршихся в свой лимит.
+
+    Аренды и места в очереди действуют ttl секунд и продлеваются
+    heartbeat и опросом очереди; аренды упавших воркеров отзываются
+    при следующем обращении к семафору.
+
+    Ожидающий не опрашивает состояние постоянно: тот, кто выдал ему
+    слоты (обычно освободивший аренду), будит его через бэкенд.
+    Без сигнала ожидающий обращается к состоянию раз в refresh_interval
+    секунд (по умолчанию ttl / 3), чтобы продлить место в очереди
+    и отозвать аренды упавших воркеров.
+    """
+
+    def __init__(
+        self,
+        backend,
+        name,
+        capacity,
+        ttl=30,
+        weights=None,
+        tenant_limits=None,
+        refresh_interval=None
+    ):
+        if capacity < 1:
+            raise ValueError('capacity must be positive')
+        self.backend = backend
+        self.name = name
+        self.capacity = capacity
+        self.ttl = ttl
+        self.weights = weights or {}
+        self.tenant_limits = tenant_limits or {}
+        self.refresh_interval = refresh_interval or ttl / 3
+
+    def _transaction(self, func, caller=None):
+        """Выполняет func, возвращающую (результат, выданные id).
+
+        Ожидающие, получившие слоты в этой транзакции, кроме caller,
+        будятся после её завершения.
+        """
+        result, granted = self.backend.transaction(self.name, func)
+        woken = [lease_id for lease_id in granted if lease_id != caller]
+        if woken:
+            self.backend.notify(self.name, woken, self.ttl)
+        return result
+
+    def _reclaim(self, state, now):
+        """Отзывает истёкшие аренды и убирает брошенные места в очереди."""
+        metrics = state['metrics']
+        for lease_id, holder in list(state['holders'].items()):
+            if holder['expires'] < now:
+                del state['holders'][lease_id]
+                metrics['expired'] += 1
+        waiters = [w for w in state['waiters'] if w['expires'] >= now]
+        metrics['abandoned'] += len(state['waiters']) - len(waiters)
+        state['waiters'] = waiters
+
+    def _grant(self, state, now):
+        """Выдаёт слоты ожидающим в порядке очереди; возвращает их id."""
+        used = sum(holder['weight'] for holder in state['holders'].values())
+        by_tenant = {}
+        for holder in state['holders'].values():
+            by_tenant[holder['tenant']] = (
+                by_tenant.get(holder['tenant'], 0) + holder['weight']
+            )
+        metrics = state['metrics']
+        waiting = []
+        granted = []
+        for position, waiter in enumerate(state['waiters']):
+            tenant, weight = waiter['tenant'], waiter['weight']
+            limit = self.tenant_limits.get(tenant)
+            if limit is not None and by_tenant.get(tenant, 0) + weight > limit:
+                waiting.append(waiter)
+                continue
+            if used + weight > self.capacity:
+                waiting.extend(state['waiters'][position:])
+                break
+            used += weight
+            by_tenant[tenant] = by_tenant.get(tenant, 0) + weight
+            state['holders'][waiter['id']] = {
+                'tenant': tenant,
+                'weight': weight,
+                'granted_at': now,
+                'expires': now + self.ttl,
+            }
+            granted.append(waiter['id'])
+            waited = now - waiter['enqueued_at']
+            metrics['acquired'] += 1
+            metrics['wait_total'] += waited
+            metrics['wait_max'] = max(metrics['wait_max'], waited)
+        state['waiters'] = waiting
+        return granted
+
+    def _enqueue(self, lease_id, tenant, weight):
+        def enqueue(state, now):
+            self._reclaim(state, now)
+            state['waiters'].append({
+                'id': lease_id,
+                'tenant': tenant,
+                'weight': weight,
+                'enqueued_at': now,
+                'expires': now + self.ttl,
+            })
+            state['metrics']['queue_depth_max'] = max(
+                state['metrics']['queue_depth_max'], len(state['waiters'])
+            )
+            granted = self._grant(state, now)
+            return lease_id in state['holders'], granted
+
+        return self._transaction(enqueue, caller=lease_id)
+
+    def _poll(self, lease_id):
+        def poll(state, now):
+            for waiter in state['waiters']:
+                if waiter['id'] == lease_id:
+                    waiter['expires'] = now + self.ttl
+            self._reclaim(state, now)
+            granted = self._grant(state, now)
+            return lease_id in state['holders'], granted
+
+        return self._transaction(poll, caller=lease_id)
+
+    def _cancel(self, lease_id):
+        def cancel(state, now):
+            if lease_id in state['holders']:
+                # Слот выдан одновременно с таймаутом: возвращаем его.
+                del state['holders'][lease_id]
+                state['metrics']['released'] += 1
+            state['waiters'] = [
+                w for w in state['waiters'] if w['id'] != lease_id
+            ]
+            state['metrics']['timeouts'] += 1
+            return None, self._grant(state, now)
+
+        self._transaction(cancel, caller=lease_id)
+        self.backend.forget(self.name, lease_id)
+
+    def _heartbeat(self, lease_id):
+        def heartbeat(state, now):
+            self._reclaim(state, now)
+            holder = state['holders'].get(lease_id)
+            if holder is None:
+                raise LeaseExpired(lease_id)
+            holder['expires'] = now + self.ttl
+            # Отозванные аренды могли освободить слоты для ожидающих.
+            return None, self._grant(state, now)
+
+        self._transaction(heartbeat)
+
+    def _release(self, lease_id):
+        def release(state, now):
+            self._reclaim(state, now)
+            holder = state['holders'].pop(lease_id, None)
+            if holder is None:
+                return False, self._grant(state, now)
+            held = now - holder['granted_at']
+            metrics = state['metrics']
+            metrics['released'] += 1
+            metrics['hold_total'] += held
+            metrics['hold_max'] = max(metrics['hold_max'], held)
+            return True, self._grant(state, now)
+
+        return self._transaction(release)
+
+    def acquire(
+        self,
+        tenant=DEFAULT_TENANT,
+        weight=None,
+        timeout=None,
+        auto_heartbeat=False
+    ):
+        """Встаёт в очередь и ждёт слоты; возвращает Lease.
+
+        Пока слоты не выданы, ожидание блокируется в бэкенде до сигнала
+        или refresh_interval. Если timeout не None и слоты не получены
+        за timeout секунд, выбрасывает SemaphoreTimeout.
+        """
+        if weight is None:
+            weight = self.weights.get(tenant, 1)
+        limit = self.tenant_limits.get(tenant, self.capacity)
+        if not 0 < weight <= min(limit, self.capacity):
+            raise ValueError(
+                f'weight {weight} does not fit the semaphore for {tenant}'
+            )
+        lease_id = uuid.uuid4().hex
+        deadline = None if timeout is None else time.monotonic() + timeout
+        granted = self._enqueue(lease_id, tenant, weight)
+        waited = False
+        while not granted:
+            wait = self.refresh_interval
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._cancel(lease_id)
+                    raise SemaphoreTimeout(f'{self.name}: {tenant}')
+                wait = min(wait, remaining)
+            self.backend.wait(self.name, lease_id, wait)
+            waited = True
+            granted = self._poll(lease_id)
+        if waited:
+            self.backend.forget(self.name, lease_id)
+        return Lease(self, lease_id, tenant, weight, auto_heartbeat)
+
+    def metrics(self):
+        """Возвращает счётчики и текущее состояние семафора.
+
+        Помимо накопленных счётчиков (число аренд, истёкших аренд,
+        таймаутов, суммарное и наибольшее время ожидания и удержания)
+        содержит текущую глубину очереди и занятые слоты по арендаторам.
+        """
+        def snapshot(state, now):
+            self._reclaim(state, now)
+            granted = self._grant(state, now)
+            in_use = {}
+            for holder in state['holders'].values():
+                in_use[holder['tenant']] = (
+                    in_use.get(holder['tenant'], 0) + holder['weight']
+                )
+            return {
+                **state['metrics'],
+                'queue_depth': len(state['waiters']),
+                'in_use': sum(in_use.values()),
+                'in_use_by_tenant': in_use,
+                'capacity': self.capacity,
+            }, granted
+
+        return self._transaction(snapshot)
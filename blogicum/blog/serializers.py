@@ -3,8 +3,49 @@ from rest_framework import serializers
 from .models import Post, Category, Location, Comment
 
 
+class CachedPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """Связанное поле, которое берёт объекты из заранее собранного кеша.
+
+    При пакетной валидации в контекст сериализатора передаётся словарь
+    related_cache: {имя поля: {pk: объект}}, и проверка связей не делает
+    отдельный запрос на каждый элемент пакета.
+    """
+
+    def to_internal_value(self, data):
+        cache = self.context.get('related_cache', {}).get(self.field_name)
+        if cache is None:
+            return super().to_internal_value(data)
+        try:
+            return cache[int(data)]
+        except KeyError:
+            self.fail('does_not_exist', pk_value=data)
+        except (TypeError, ValueError):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+
+
 class PostSerializer(serializers.ModelSerializer):
+    """Сериализатор публикаций с поддержкой выборочных полей.
+
+    Если передан аргумент fields, сериализуются только перечисленные поля.
+    """
+
+    serializer_related_field = CachedPrimaryKeyRelatedField
+
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
 
     class Meta:
         model = Post
-        fields = ('id', 'title', 'text', 'author', 'location', 'category')
+        fields = (
+            'id',
+            'title',
+            'text',
+            'pub_date',
+            'author',
+            'location',
+            'category',
+            'updated_at',
+        )
@@ -0,0 +1,68 @@
+from django.db.models import F, Value
+from django.db.models.functions import Greatest
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .cache import bump_feed_version, bump_version
+from .models import Category, Comment, Location, Post, PostTombstone, User
+
+
+@receiver(post_save, sender=Comment)
+def touch_post_on_comment_save(sender, instance, created, **kwargs):
+    """Отмечает изменение поста при создании или правке комментария.
+
+    При создании комментария также увеличивается счётчик комментариев.
+    """
+    changes = {'updated_at': timezone.now()}
+    if created:
+        changes['comment_count'] = F('comment_count') + 1
+    Post.objects.filter(pk=instance.post_id).update(**changes)
+
+
+@receiver(post_delete, sender=Comment)
+def decrement_comment_count(sender, instance, **kwargs):
+    """Уменьшает счётчик комментариев поста при удалении комментария.
+
+    Сигнал отправляется и при каскадном удалении, и при удалении
+    через QuerySet.delete(), поэтому счётчик остаётся согласованным.
+    """
+    Post.objects.filter(pk=instance.post_id).update(
+        comment_count=Greatest(F('comment_count') - 1, Value(0)),
+        updated_at=timezone.now()
+    )
+
+
+@receiver(post_delete, sender=Post)
+def create_post_tombstone(sender, instance, **kwargs):
+    """Запоминает удаление поста для инкрементальной синхронизации."""
+    PostTombstone.objects.create(post_id=instance.pk)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_save, sender=Category)
+@receiver(post_save, sender=Location)
+@receiver(post_save, sender=User)
+def invalidate_post_cards(sender, instance, **kwargs):
+    """Делает устаревшими закешированные карточки постов объекта."""
+    bump_version(sender._meta.model_name, instance.pk)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=Location)
+@receiver(post_delete, sender=Location)
+def invalidate_feeds(sender, **kwargs):
+    """Делает устаревшими закешированные ленты публикаций."""
+    bump_feed_version()
+
+
+@receiver(post_save, sender=User)
+def invalidate_feeds_on_user_change(sender, update_fields=None, **kwargs):
+    """Сбрасывает ленты при изменении пользователя, кроме входа на сайт."""
+    if update_fields is None or set(update_fields) != {'last_login'}:
+        bump_feed_version()
@@ -1,13 +1,67 @@
 from celery import shared_task, group, chain, chord
 import logging
-from redis_semaphore import Semaphore
-import time
+import threading
 from pprint import pprint
 from redis import Redis
+from django.utils import timezone
+
+import core.blog_settings
+from .cache import bump_feed_version
+from .llm import CompletionBatcher, CompletionPool, StubBackend
+from .models import Post
+from .semaphore import DEFAULT_TENANT, LeaseSemaphore, RedisBackend
 
 
 logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
-semaphore = Semaphore(Redis(), count=1, namespace='llm')
+_llm_lock = threading.Lock()
+_completion_batcher = None
+
+
+def get_completion_batcher():
+    """Возвращает общий для процесса сборщик пакетов запросов к LLM.
+
+    Семафор в Redis, пул потоков и сборщик создаются при первом запросе
+    к LLM, а не при импорте модуля, поэтому процессы, которые только
+    импортируют задачи (веб-сервер, celery beat), их не создают.
+    """
+    global _completion_batcher
+    with _llm_lock:
+        if _completion_batcher is None:
+            semaphore = LeaseSemaphore(
+                RedisBackend(Redis()),
+                'llm',
+                capacity=core.blog_settings.LLM_CONCURRENCY,
+                ttl=core.blog_settings.LLM_LEASE_TTL,
+                weights=core.blog_settings.LLM_TENANT_WEIGHTS,
+                tenant_limits=core.blog_settings.LLM_TENANT_LIMITS,
+            )
+            completion_pool = CompletionPool(
+                StubBackend(delay=core.blog_settings.LLM_STUB_DELAY),
+                limiter=lambda tenant: semaphore.acquire(
+                    tenant, auto_heartbeat=True
+                )
+            )
+            _completion_batcher = CompletionBatcher(completion_pool)
+    return _completion_batcher
+
+
+@shared_task
+def publish_scheduled_posts():
+    """Открывает отложенные посты, дата публикации которых наступила.
+
+    Запускается периодически через celery beat. Если хотя бы один пост
+    стал видимым, версия лент увеличивается, и закешированные ленты
+    перестают использоваться.
+    """
+    now = timezone.now()
+    published = Post.objects.filter(
+        is_visible=False,
+        pub_date__lte=now
+    ).update(is_visible=True, updated_at=now)
+    if published:
+        bump_feed_version()
+    logging.info(f"Scheduled posts published: {published}")
+    return published
 
 
 @shared_task(
@@ -20,19 +74,21 @@ def run_rag_process(self, pid):
     return result
 
 
-def get_completion(prompt, id):
-    """Заглушка для запроса к LLM
+def get_completion(prompt, id, tenant=DEFAULT_TENANT):
+    """Запрос к LLM через общий сборщик get_completion_batcher().
 
-    Имитирует долгий запрос (60 секунд) и возвращает уникальный ID.
-    Работа с семафором.
+    Одновременные запросы воркера собираются в пакеты до LLM_BATCH_SIZE
+    запросов, ожидающие не дольше LLM_BATCH_WAIT секунд; пакет
+    отправляется одним вызовом LLM. Параллельность ограничена
+    LLM_CONCURRENCY внутри процесса и семафором LeaseSemaphore между
+    воркерами: слоты выдаются по очереди, с учётом веса и лимита
+    арендатора tenant, а аренда упавшего воркера истекает через
+    LLM_LEASE_TTL секунд. Каждая попытка ограничена LLM_TIMEOUT секунд
+    и повторяется до LLM_RETRIES раз.
+    Пока бэкендом служит заглушка, имитирующая долгий запрос
+    и возвращающая уникальный ID.
     """
     logging.info(f"[{id}]: waiting...")
-    with semaphore:
-        logging.info(f"[{id}]: start")
-        time.sleep(30)
-        logging.info(f"[{id}]: done")
-    return {
-        'id': id,
-        'timestamp': time.time()
-    }
-
+    result = get_completion_batcher().complete(prompt, id, tenant)
+    logging.info(f"[{id}]: done")
+    return result
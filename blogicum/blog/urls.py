@@ -1,6 +1,6 @@
 from django.urls import path
 
-from . import views
+from . import api, views
 
 app_name = 'blog'
 
@@ -11,6 +11,22 @@ urlpatterns = [
 
     path('list/', views.get_list),
 
+    path('api/tags/toggle-status/',
+         api.toggle_tags_status,
+         name='toggle_tags_status'),
+    path('api/tags/delete/', api.delete_tags, name='delete_tags'),
+    path('api/tags/<int:tag_id>/toggle-status/',
+         api.toggle_tag_status,
+         name='toggle_tag_status'),
+    path('api/tags/<int:tag_id>/delete/',
+         api.delete_tag,
+         name='delete_tag'),
+
+    path('api/graphs/', api.build_graph, name='build_graph'),
+    path('api/graphs/<slug:digest>/',
+         api.graph_detail,
+         name='graph_detail'),
+
     path('task/', views.run_celery_task, name='new_task'),
     path('task/<slug:task_id>/', views.get_task_status, name='check_status'),
 
@@ -18,6 +34,9 @@ urlpatterns = [
     path('posts/<int:post_id>/',
          views.post_detail,
          name='post_detail'),
+    path('posts/<int:post_id>/comments/',
+         views.post_comments,
+         name='post_comments'),
     path('posts/create/', views.post, name='create_post'),
     path('posts/<int:post_id>/edit/', views.post, name='edit_post'),
     path('posts/<int:post_id>/delete/', views.delete_post, name='delete_post'),
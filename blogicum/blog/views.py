@@ -1,34 +1,342 @@
+from collections.abc import Iterator
+from itertools import islice
+
 from django.contrib.auth import logout
 from django.contrib.auth.decorators import login_required
 from django.core.paginator import Paginator
-from django.db.models import Count
-from django.http import Http404
+from django.db import transaction
+from django.db.models import Prefetch
+from django.http import Http404, JsonResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404, redirect, render
+from django.template.loader import render_to_string
 from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django.utils.safestring import mark_safe
 from rest_framework import viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.parsers import JSONParser
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.response import Response
 from .serializers import PostSerializer
 
 import core.blog_settings
-from blog.models import Category, Comment, Post, User
+from blog.models import (
+    Category, Comment, Location, Post, PostTombstone, Tag, User
+)
 from users.forms import EditUserForm
 
+from .cache import (
+    attach_card_versions, bump_feed_version, bump_version,
+    cache_feed_for_anonymous, condition_on_post, conditional_response,
+    post_validators, set_validators
+)
 from .forms import CommentForm, PostForm
+from .pagination import CursorPage, InvalidCursor, PostCursorPagination
+from .parsers import NDJSONParser
+
+
+STREAM_MARKER = mark_safe('<!-- documents -->')
+"""Место в шаблоне списка документов, куда выводятся строки потока."""
+
+
+def stream_documents(posts, chunk_size):
+    """Отрисовывает строки списка документов порциями по chunk_size."""
+    chunk = []
+    for post in posts.iterator(chunk_size=chunk_size):
+        chunk.append(post)
+        if len(chunk) == chunk_size:
+            yield render_to_string(
+                'includes/document_rows.html', {'documents': chunk}
+            )
+            chunk = []
+    if chunk:
+        yield render_to_string(
+            'includes/document_rows.html', {'documents': chunk}
+        )
 
 
 def get_list(request):
+    """Отдаёт список всех документов потоком.
+
+    Страница отрисовывается без строк и разрезается по STREAM_MARKER:
+    сначала отправляется начало страницы, затем строки документов
+    порциями по LIST_CHUNK_SIZE, затем окончание страницы. Из БД
+    выбираются только поля, которые выводит шаблон; теги подгружаются
+    одним запросом на порцию.
+    """
+    page = render_to_string(
+        'blog/list.html',
+        {'documents': (), 'stream_marker': STREAM_MARKER},
+        request=request
+    )
+    head, tail = page.split(STREAM_MARKER)
+    posts = Post.objects.only('id', 'title').prefetch_related(
+        Prefetch('tags', queryset=Tag.objects.only('id', 'title', 'status'))
+    ).order_by('pk')
+
+    def content():
+        yield head
+        yield from stream_documents(
+            posts, core.blog_settings.LIST_CHUNK_SIZE
+        )
+        yield tail
 
-    context = {}
-    posts = Post.objects.all().select_related('category')
-    for post in posts:
-        post.tags = [post.category,]
-    context['documents'] = posts
-    return render(request, 'blog/list.html', context=context)
+    return StreamingHttpResponse(content())
 
 
 class PostViewSet(viewsets.ModelViewSet):
-    """Endpoint для API запросов."""
+    """Endpoint для API запросов.
+
+    Поддерживает GET-параметры:
+        fields: список полей через запятую; ограничивает и ответ,
+            и набор столбцов, выбираемых из БД.
+        pagination=cursor: курсорная пагинация по (pub_date, id)
+            вместо постраничной.
+
+    GET /posts/changes/?since=<ISO 8601> отдаёт изменённые посты
+    и id удалённых постов после указанной отметки времени.
+
+    POST /posts/bulk/ создаёт и изменяет посты пакетами.
+
+    GET /posts/<id>/ поддерживает условные запросы (ETag, Last-Modified).
+    """
     queryset = Post.objects.all()
     serializer_class = PostSerializer
+    relation_fields = ('author', 'location', 'category')
+    relation_models = {'author': User, 'location': Location,
+                       'category': Category}
+
+    @property
+    def paginator(self):
+        if not hasattr(self, '_paginator'):
+            params = self.request.query_params
+            if params.get('pagination') == 'cursor' or 'cursor' in params:
+                self._paginator = PostCursorPagination()
+            else:
+                self._paginator = super().paginator
+        return self._paginator
+
+    def get_requested_fields(self):
+        """Возвращает поля из параметра fields или None."""
+        if self.request.method not in SAFE_METHODS:
+            return None
+        raw_fields = self.request.query_params.get('fields')
+        if not raw_fields:
+            return None
+        fields = tuple(
+            name.strip() for name in raw_fields.split(',') if name.strip()
+        )
+        unknown = set(fields) - set(PostSerializer.Meta.fields)
+        if unknown:
+            raise ValidationError(
+                {'fields': f'Неизвестные поля: {", ".join(sorted(unknown))}'}
+            )
+        return fields
+
+    def get_serializer(self, *args, **kwargs):
+        fields = self.get_requested_fields()
+        if fields is not None:
+            kwargs['fields'] = fields
+        return super().get_serializer(*args, **kwargs)
+
+    def get_queryset(self):
+        fields = self.get_requested_fields() or PostSerializer.Meta.fields
+        relations = [name for name in self.relation_fields if name in fields]
+        posts = Post.objects.select_related(*relations).order_by(
+            '-pub_date', '-id'
+        )
+        if self.request.method in SAFE_METHODS:
+            posts = posts.only('id', 'pub_date', 'updated_at', *fields)
+        return posts
+
+    def retrieve(self, request, *args, **kwargs):
+        """Отдаёт пост или 304, если у клиента актуальная версия."""
+        etag, last_modified = post_validators(
+            kwargs[self.lookup_url_kwarg or self.lookup_field], 'api',
+            request.query_params.get('fields', '')
+        )
+        response = conditional_response(request, etag, last_modified)
+        if response is None:
+            response = super().retrieve(request, *args, **kwargs)
+        return set_validators(response, etag, last_modified)
+
+    @action(detail=False, methods=['get'])
+    def changes(self, request):
+        """Возвращает изменения публикаций после отметки since.
+
+        Окно изменений (since, watermark] содержит не меньше
+        CHANGES_BATCH_SIZE изменений, если они есть, и всегда включает
+        все записи с временем, равным watermark, поэтому следующий запрос
+        с since=watermark ничего не пропустит. Оба запроса идут по
+        индексам (updated_at, id) и (deleted_at, id).
+        """
+        since = request.query_params.get('since')
+        if since is not None:
+            since = parse_datetime(since)
+            if since is None:
+                raise ValidationError(
+                    {'since': 'Ожидается дата и время в формате ISO 8601.'}
+                )
+            if timezone.is_naive(since):
+                since = timezone.make_aware(since)
+
+        posts = self.get_queryset().order_by('updated_at', 'id')
+        tombstones = PostTombstone.objects.order_by('deleted_at', 'id')
+        if since is not None:
+            posts = posts.filter(updated_at__gt=since)
+            tombstones = tombstones.filter(deleted_at__gt=since)
+
+        batch_size = core.blog_settings.CHANGES_BATCH_SIZE
+        bounds = [
+            stamps[batch_size - 1]
+            for stamps in (
+                list(posts.values_list('updated_at', flat=True)
+                     [:batch_size + 1]),
+                list(tombstones.values_list('deleted_at', flat=True)
+                     [:batch_size + 1]),
+            )
+            if len(stamps) > batch_size
+        ]
+        watermark = min(bounds) if bounds else None
+        if watermark is not None:
+            posts = posts.filter(updated_at__lte=watermark)
+            tombstones = tombstones.filter(deleted_at__lte=watermark)
+
+        posts = list(posts)
+        deleted = list(tombstones.values_list('post_id', 'deleted_at'))
+        has_more = watermark is not None
+        if watermark is None:
+            stamps = [post.updated_at for post in posts[-1:]] + [
+                deleted_at for _, deleted_at in deleted[-1:]
+            ]
+            watermark = max(stamps, default=since)
+
+        return Response({
+            'changes': self.get_serializer(posts, many=True).data,
+            'deleted': [post_id for post_id, _ in deleted],
+            'watermark': watermark,
+            'has_more': has_more,
+        })
+
+    @action(
+        detail=False,
+        methods=['post'],
+        parser_classes=(JSONParser, NDJSONParser)
+    )
+    def bulk(self, request):
+        """Создаёт и изменяет публикации пакетами.
+
+        Принимает JSON-массив объектов или поток NDJSON
+        (application/x-ndjson). Объект с полем id изменяет существующий
+        пост (частично), объект без id создаёт новый. Элементы проверяются
+        PostSerializer порциями по BULK_BATCH_SIZE и записываются через
+        bulk_create/bulk_update в одной транзакции; ошибочные элементы
+        пропускаются. Для каждого элемента возвращается результат:
+        index, id, status (created, updated или error) и errors.
+        """
+        items = request.data
+        if not isinstance(items, (list, Iterator)):
+            raise ValidationError(
+                {'non_field_errors': 'Ожидается массив объектов.'}
+            )
+        items = iter(items)
+        batch_size = core.blog_settings.BULK_BATCH_SIZE
+        results = []
+        updated_ids = set()
+        with transaction.atomic():
+            while batch := list(islice(items, batch_size)):
+                batch_results, batch_updated = self.write_batch(
+                    batch, offset=len(results)
+                )
+                results.extend(batch_results)
+                updated_ids.update(batch_updated)
+
+        # bulk_create и bulk_update не отправляют сигналы post_save.
+        if any(result['status'] != 'error' for result in results):
+            bump_feed_version()
+        for post_id in updated_ids:
+            bump_version('post', post_id)
+
+        return Response({
+            'results': results,
+            'created': sum(r['status'] == 'created' for r in results),
+            'updated': sum(r['status'] == 'updated' for r in results),
+            'errors': sum(r['status'] == 'error' for r in results),
+        })
+
+    @staticmethod
+    def collect_ids(batch, name):
+        """Собирает целочисленные значения поля name из элементов пакета."""
+        pks = set()
+        for item in batch:
+            try:
+                pks.add(int(item[name]))
+            except (KeyError, TypeError, ValueError):
+                pass
+        return pks
+
+    def write_batch(self, batch, offset):
+        """Проверяет и записывает один пакет публикаций.
+
+        Изменяемые посты и связанные объекты пакета загружаются
+        по одному запросу на модель, а не на каждый элемент.
+        Возвращает результаты по элементам пакета и id изменённых постов.
+        """
+        objects = [item for item in batch if isinstance(item, dict)]
+        instances = Post.objects.in_bulk(self.collect_ids(objects, 'id'))
+        context = self.get_serializer_context()
+        context['related_cache'] = {
+            name: model.objects.in_bulk(self.collect_ids(objects, name))
+            for name, model in self.relation_models.items()
+        }
+
+        results, created, updated, update_fields = [], [], {}, set()
+        now = timezone.now()
+        for index, item in enumerate(batch, start=offset):
+            result = {'index': index, 'id': None, 'status': 'error'}
+            results.append(result)
+            if not isinstance(item, dict):
+                result['errors'] = {'non_field_errors': ['Ожидается объект.']}
+                continue
+            instance = None
+            if 'id' in item:
+                result['id'] = item['id']
+                try:
+                    instance = instances.get(int(item['id']))
+                except (TypeError, ValueError):
+                    pass
+                if instance is None:
+                    result['errors'] = {'id': ['Публикация не найдена.']}
+                    continue
+            serializer = PostSerializer(
+                instance, data=item, partial=instance is not None,
+                context=context
+            )
+            if not serializer.is_valid():
+                result['errors'] = serializer.errors
+                continue
+            post = instance or Post()
+            for name, value in serializer.validated_data.items():
+                setattr(post, name, value)
+            derived = post.fill_derived_fields()
+            if instance is None:
+                result['status'] = 'created'
+                created.append((result, post))
+            else:
+                post.updated_at = now
+                update_fields.update(
+                    serializer.validated_data, derived, ('updated_at',)
+                )
+                updated[post.pk] = post
+                result['status'] = 'updated'
+
+        Post.objects.bulk_create(post for _, post in created)
+        for result, post in created:
+            result['id'] = post.pk
+        if updated:
+            Post.objects.bulk_update(updated.values(), update_fields)
+        return results, set(updated)
 
 
 def get_filtered_posts(
@@ -44,19 +352,17 @@ def get_filtered_posts(
 
     Returns:
         QuerySet с постами, отсортированный по дате публикации (новые сначала).
+        Полный текст постов не загружается: в лентах выводится анонс.
     """
-    posts = Post.objects.annotate(comment_count=Count('comments'))
-
-    posts = posts.select_related(
+    posts = Post.objects.select_related(
         'author',
         'category',
         'location'
-    )
+    ).defer('text')
 
     if published_only:
-        current_datetime = timezone.now()
         posts = posts.filter(
-            pub_date__lte=current_datetime,
+            is_visible=True,
             is_published=True,
             category__is_published=True
         )
@@ -65,32 +371,50 @@ def get_filtered_posts(
     if profile:
         posts = posts.filter(author=profile)
 
-    return posts.order_by('-pub_date')
+    return posts.order_by('-pub_date', '-pk')
 
 
 def get_page_objects(
     request,
     posts,
     page_param='page',
-    default_page=1
+    default_page=1,
+    cursor_param='cursor'
 ):
     """Возвращает список объектов страницы просмотра постов.
 
+    Курсорный режим включается настройкой CURSOR_PAGINATION или
+    наличием GET-параметра с курсором в запросе. Постам страницы
+    проставляются версии для кеша карточек.
+
     Args:
         request: HttpRequest объект.
         posts: QuerySet, содержащий посты.
         page_param: имя GET-параметра для номера страницы.
         default_page: номер страницы по умолчанию.
+        cursor_param: имя GET-параметра для курсора.
 
     Returns:
-        Page object
+        Page object или CursorPage в курсорном режиме.
     """
-    paginator = Paginator(posts, core.blog_settings.VIEWED_POSTS)
-    page_number = request.GET.get(page_param, default_page)
+    cursor = request.GET.get(cursor_param)
+    if core.blog_settings.CURSOR_PAGINATION or cursor is not None:
+        try:
+            page_obj = CursorPage(
+                posts, core.blog_settings.VIEWED_POSTS, cursor
+            )
+        except InvalidCursor:
+            page_obj = CursorPage(posts, core.blog_settings.VIEWED_POSTS)
+    else:
+        paginator = Paginator(posts, core.blog_settings.VIEWED_POSTS)
+        page_number = request.GET.get(page_param, default_page)
+        page_obj = paginator.get_page(page_number)
 
-    return paginator.get_page(page_number)
+    attach_card_versions(page_obj)
+    return page_obj
 
 
+@cache_feed_for_anonymous
 def index(request):
     """Отображает главную страницу Блогикума."""
     posts = get_filtered_posts()
@@ -100,32 +424,100 @@ def index(request):
     return render(request, 'blog/index.html', context)
 
 
-def post_detail(request, post_id):
-    """Отображает страницу отдельной публикации с комментариями."""
-    post = get_object_or_404(
-        get_filtered_posts(published_only=False),
-        pk=post_id
-    )
-
+def check_post_visibility(request, post):
+    """Скрывает неопубликованный пост ото всех, кроме его автора."""
     is_author = request.user.is_authenticated and post.author == request.user
     is_displayed = (
         post.is_published
         and post.category.is_published
-        and post.pub_date <= timezone.now()
+        and post.is_visible
     )
 
     if not (is_author or is_displayed):
         raise Http404("Пост не найден.")
 
+
+def get_comments_page(post, cursor=None):
+    """Возвращает страницу комментариев поста, от старых к новым.
+
+    Args:
+        post: пост, комментарии которого выводятся.
+        cursor: курсор, после которого начинается страница.
+
+    Returns:
+        CursorPage с комментариями и их авторами.
+    """
+    return CursorPage(
+        post.comments.select_related('author'),
+        core.blog_settings.VIEWED_COMMENTS,
+        cursor,
+        key_field='created_at',
+        descending=False
+    )
+
+
+def get_post_or_404(post_id):
+    """Получает один пост вместе с автором, категорией и местоположением.
+
+    В отличие от get_filtered_posts не сортирует выборку и не отбрасывает
+    полный текст: пост выбирается одним запросом по первичному ключу.
+    """
+    return get_object_or_404(
+        Post.objects.select_related('author', 'category', 'location'),
+        pk=post_id
+    )
+
+
+@condition_on_post
+def post_detail(request, post_id):
+    """Отображает страницу отдельной публикации с комментариями.
+
+    Пост со связанными объектами и первая страница комментариев с их
+    авторами загружаются двумя запросами независимо от числа комментариев.
+    Ответ снабжается заголовками ETag и Last-Modified.
+    """
+    post = get_post_or_404(post_id)
+    check_post_visibility(request, post)
+
     context = {
         'post': post,
-        'comments': post.comments.order_by('created_at'),
+        'comments': get_comments_page(post),
         'form': CommentForm(),
     }
 
     return render(request, 'blog/detail.html', context)
 
 
+def post_comments(request, post_id):
+    """Возвращает следующую порцию комментариев поста в виде JSON.
+
+    Ответ содержит HTML-фрагмент со списком комментариев и курсор
+    для загрузки следующей порции (null, если комментариев больше нет).
+    """
+    post = get_post_or_404(post_id)
+    check_post_visibility(request, post)
+
+    try:
+        comments = get_comments_page(post, request.GET.get('cursor'))
+    except InvalidCursor:
+        return JsonResponse({
+            'success': False,
+            'error': 'Invalid cursor'
+        }, status=400)
+
+    html = render_to_string(
+        'includes/comments.html',
+        {'post': post, 'comments': comments, 'fragment': True},
+        request=request
+    )
+    return JsonResponse({
+        'success': True,
+        'html': html,
+        'next_cursor': comments.next_cursor
+    })
+
+
+@cache_feed_for_anonymous
 def category_posts(request, category_slug):
     """Отображает страницу с постами указанной категории."""
     category = get_object_or_404(
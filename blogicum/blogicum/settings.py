@@ -88,6 +88,20 @@ STATICFILES_DIRS = [
 
 WSGI_APPLICATION = 'blogicum.wsgi.application'
 
+if os.environ.get('REDIS_CACHE_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['REDIS_CACHE_URL'],
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
@@ -138,6 +152,12 @@ CELERY_BROKER_TRANSPORT_OPTIONS = {
     'socket_timeout': 30,
     'retry_on_timeout': True,
 }
+CELERY_BEAT_SCHEDULE = {
+    'publish-scheduled-posts': {
+        'task': 'blog.tasks.publish_scheduled_posts',
+        'schedule': 60.0,
+    },
+}
 # import kombu
 # kombu.transport
 # kombu.transport.redis.Transport.connection_errors = ()  # Это может помочь
@@ -11,3 +11,60 @@ VIEWED_POSTS = 10
 
 MAX_VIEWED_LENGTH = 50
 """Максимальная длина отображаемого текста в списках."""
+
+CURSOR_PAGINATION = False
+"""Использовать курсорную пагинацию лент вместо постраничной."""
+
+EXCERPT_WORDS = 10
+"""Количество слов в анонсе публикации."""
+
+FEED_CACHE_TIMEOUT = 60 * 5
+"""Время жизни закешированной ленты для анонимных читателей, в секундах."""
+
+VIEWED_COMMENTS = 20
+"""Количество комментариев, загружаемых на страницу поста за один раз."""
+
+LIST_CHUNK_SIZE = 200
+"""Количество документов, выбираемых и отправляемых одной порцией."""
+
+TAG_STATUS_LENGTH = 16
+"""Максимальная длина статуса тега."""
+
+CHANGES_BATCH_SIZE = 100
+"""Примерный размер порции изменений в API синхронизации публикаций."""
+
+BULK_BATCH_SIZE = 500
+"""Количество публикаций, проверяемых и записываемых в БД одним пакетом."""
+
+GRAPH_CACHE_TIMEOUT = 60 * 60 * 24
+"""Время жизни закешированного графа трассировки документов, в секундах."""
+
+LLM_CONCURRENCY = 4
+"""Максимальное число одновременных запросов к LLM."""
+
+LLM_TIMEOUT = 60
+"""Время на одну попытку запроса к LLM, в секундах."""
+
+LLM_RETRIES = 2
+"""Число повторов запроса к LLM после ошибки или таймаута."""
+
+LLM_RETRY_BACKOFF = 1
+"""Пауза перед первым повтором запроса к LLM, в секундах."""
+
+LLM_STUB_DELAY = 30
+"""Длительность запроса заглушки LLM, в секундах."""
+
+LLM_LEASE_TTL = 30
+"""Время жизни аренды слота LLM без продления, в секундах."""
+
+LLM_TENANT_WEIGHTS = {}
+"""Число слотов LLM, занимаемых одним запросом арендатора (по умолчанию 1)."""
+
+LLM_TENANT_LIMITS = {}
+"""Наибольшее число слотов LLM, одновременно занятых одним арендатором."""
+
+LLM_BATCH_SIZE = 8
+"""Наибольшее число запросов к LLM, отправляемых одним пакетом."""
+
+LLM_BATCH_WAIT = 0.05
+"""Время ожидания попутчиков для пакета запросов к LLM, в секундах."""
@@ -18,3 +18,16 @@ class CoreEntity(models.Model):
 
     class Meta:
         abstract = True
+
+
+class TrackedEntity(CoreEntity):
+    """Добавляет к служебным полям время последнего изменения."""
+
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        null=False,
+        verbose_name='Изменено'
+    )
+
+    class Meta:
+        abstract = True
@@ -0,0 +1,41 @@
+import random
+
+import pytest
+
+GRAPH_STAGES = ('retrieval', 'rerank', 'filter', 'compression', 'answer')
+
+
+def make_trace(docs_per_stage, stages=GRAPH_STAGES, refs_per_doc=3, seed=0):
+    """Синтетическая трасса RAG-конвейера в формате statistic_data.
+
+    Каждый этап выбирает часть документов предыдущего этапа и добавляет
+    новые; документ ссылается на документы любых предыдущих этапов.
+    Возвращает (statistic_data, docs_data).
+    """
+    rng = random.Random(seed)
+    statistic_data, seen, next_id = [], [], 0
+    for stage in stages:
+        kept = rng.sample(seen, min(len(seen), docs_per_stage // 2))
+        new_ids = [
+            f'doc{next_id + i}' for i in range(docs_per_stage - len(kept))
+        ]
+        next_id += len(new_ids)
+        documents = []
+        for doc_id in kept + new_ids:
+            refs = rng.sample(seen, min(len(seen), refs_per_doc))
+            documents.append({'id': doc_id, 'ref': refs})
+        if documents and seen:
+            # Пустая ссылка, повторная ссылка и повтор документа на этапе.
+            documents[0]['ref'] += ['', documents[0]['ref'][0]]
+            documents.append(dict(documents[-1]))
+        statistic_data.append(
+            {'stage': stage, 'processed_documents': documents}
+        )
+        seen.extend(new_ids)
+    docs_data = {doc_id: {'title': doc_id} for doc_id in seen[::2]}
+    return statistic_data, docs_data
+
+
+@pytest.fixture
+def rag_trace():
+    return make_trace(40)
@@ -0,0 +1,72 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from blog.models import Comment, Post
+
+
+@pytest.mark.django_db
+def test_comment_count_follows_comments(mixer, post_with_published_location):
+    post = post_with_published_location
+    comments = mixer.cycle(3).blend('blog.Comment', post=post)
+    post.refresh_from_db()
+    assert post.comment_count == 3, (
+        'Убедитесь, что при создании комментария увеличивается '
+        'счётчик `comment_count` поста.'
+    )
+
+    comments[0].delete()
+    post.refresh_from_db()
+    assert post.comment_count == 2, (
+        'Убедитесь, что при удалении комментария уменьшается '
+        'счётчик `comment_count` поста.'
+    )
+
+    Comment.objects.filter(post=post).delete()
+    post.refresh_from_db()
+    assert post.comment_count == 0, (
+        'Убедитесь, что счётчик `comment_count` учитывает массовое '
+        'удаление комментариев.'
+    )
+
+
+@pytest.mark.django_db
+def test_comment_count_cascade(mixer, post_with_published_location):
+    post = post_with_published_location
+    comment = mixer.blend('blog.Comment', post=post)
+    comment.author.delete()
+    post.refresh_from_db()
+    assert post.comment_count == 0, (
+        'Убедитесь, что счётчик `comment_count` учитывает каскадное '
+        'удаление комментариев.'
+    )
+
+
+@pytest.mark.django_db
+def test_recount_comments_command(mixer, post_with_published_location):
+    post = post_with_published_location
+    mixer.cycle(2).blend('blog.Comment', post=post)
+    Post.objects.update(comment_count=42)
+    call_command('recount_comments', stdout=StringIO())
+    post.refresh_from_db()
+    assert post.comment_count == 2, (
+        'Убедитесь, что команда `recount_comments` восстанавливает '
+        'счётчик комментариев.'
+    )
+
+
+@pytest.mark.django_db
+def test_stale_post_save_keeps_comment_count(
+    mixer, post_with_published_location
+):
+    stale = Post.objects.get(pk=post_with_published_location.pk)
+    mixer.blend('blog.Comment', post=post_with_published_location)
+    stale.title = 'Новый заголовок'
+    stale.save()
+    stale.refresh_from_db()
+    assert stale.title == 'Новый заголовок'
+    assert stale.comment_count == 1, (
+        'Убедитесь, что сохранение поста не затирает счётчик '
+        '`comment_count`, изменённый после загрузки поста.'
+    )
@@ -0,0 +1,72 @@
+import tracemalloc
+
+import pytest
+
+from blog.compact_graph import CompactGraph
+from blog.graph_processing import build_document_traversal
+from fixtures.graphs import make_trace
+
+MEMORY_TRACE_SIZE = 2000
+"""Количество документов на этапе в трассе для замера памяти."""
+
+
+def test_compact_round_trip(rag_trace):
+    graph = build_document_traversal(*rag_trace)
+    compact = CompactGraph.from_dict(graph)
+    assert compact.node_count == len(graph['nodes'])
+    assert compact.edge_count == len(graph['edges'])
+    assert compact.to_dict() == graph, (
+        'Убедитесь, что преобразование в компактный граф и обратно '
+        'не теряет данных.'
+    )
+    assert CompactGraph.from_traversal(*rag_trace).to_dict() == graph
+
+
+def test_compact_csr(rag_trace):
+    graph = build_document_traversal(*rag_trace)
+    compact = CompactGraph.from_dict(graph)
+    keys = list(graph['nodes'])
+    for csr, end, other in (
+        (compact.out_csr(), 'from', 'to'), (compact.in_csr(), 'to', 'from')
+    ):
+        indptr, indices = csr
+        for node, key in enumerate(keys):
+            neighbours = [
+                keys[index] for index in indices[indptr[node]:indptr[node + 1]]
+            ]
+            assert neighbours == [
+                edge[other] for edge in graph['edges'] if edge[end] == key
+            ]
+
+
+def test_compact_numpy(rag_trace):
+    numpy = pytest.importorskip('numpy')
+    compact = CompactGraph.from_traversal(*rag_trace)
+    arrays = compact.as_numpy()
+    assert numpy.array_equal(arrays['edge_from'], list(compact.edge_from))
+    assert arrays['indptr'][-1] == compact.edge_count
+
+
+def _allocated(build):
+    tracemalloc.start()
+    try:
+        result = build()
+        return result, tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+
+
+def test_compact_memory():
+    trace = make_trace(MEMORY_TRACE_SIZE)
+    graph, dict_bytes = _allocated(lambda: build_document_traversal(*trace))
+    compact, compact_bytes = _allocated(
+        lambda: CompactGraph.from_traversal(*trace)
+    )
+    print(
+        f'\nузлов: {compact.node_count}, рёбер: {compact.edge_count}, '
+        f'словари: {dict_bytes / 2 ** 20:.1f} МБ, '
+        f'массивы: {compact_bytes / 2 ** 20:.1f} МБ'
+    )
+    assert compact_bytes * 2 < dict_bytes, (
+        'Убедитесь, что компактный граф занимает заметно меньше памяти.'
+    )
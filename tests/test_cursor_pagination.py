@@ -0,0 +1,49 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from conftest import N_PER_PAGE
+
+
+@pytest.mark.django_db
+def test_cursor_pagination_walks_feed(
+    client, many_posts_with_published_locations
+):
+    posts = many_posts_with_published_locations
+    expected = sorted(posts, key=lambda post: (post.pub_date, post.pk),
+                      reverse=True)
+
+    seen = []
+    cursor = ''
+    while cursor is not None:
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get('/', {'cursor': cursor})
+        assert not any(
+            'COUNT(' in query['sql'].upper() for query in queries
+        ), 'Убедитесь, что курсорная пагинация не выполняет COUNT(*).'
+        page_obj = response.context['page_obj']
+        assert len(page_obj) <= N_PER_PAGE
+        seen.extend(page_obj)
+        cursor = page_obj.next_cursor
+
+    assert [post.pk for post in seen] == [post.pk for post in expected], (
+        'Убедитесь, что курсорная пагинация обходит ленту целиком, '
+        'без пропусков и повторов, «от новых к старым».'
+    )
+
+    previous = client.get(
+        '/', {'cursor': page_obj.previous_cursor}
+    ).context['page_obj']
+    assert [post.pk for post in previous] == [
+        post.pk for post in expected[-len(page_obj) - N_PER_PAGE:
+                                     -len(page_obj)]
+    ], 'Убедитесь, что курсор предыдущей страницы ведёт назад по ленте.'
+
+
+@pytest.mark.django_db
+def test_cursor_pagination_invalid_cursor(
+    client, many_posts_with_published_locations
+):
+    response = client.get('/', {'cursor': 'not-a-cursor'})
+    assert len(response.context['page_obj']) == N_PER_PAGE
+    assert not response.context['page_obj'].has_previous()
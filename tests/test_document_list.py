@@ -0,0 +1,30 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+import core.blog_settings
+
+
+@pytest.mark.django_db
+def test_list_streams_documents_in_chunks(
+    client, monkeypatch, many_posts_with_published_locations
+):
+    posts = many_posts_with_published_locations
+    chunk_size = 3
+    monkeypatch.setattr(core.blog_settings, 'LIST_CHUNK_SIZE', chunk_size)
+
+    response = client.get('/list/')
+    assert response.streaming, (
+        'Убедитесь, что список документов отдаётся потоком.'
+    )
+    with CaptureQueriesContext(connection) as queries:
+        parts = [part.decode('utf-8') for part in response.streaming_content]
+
+    n_chunks = -(-len(posts) // chunk_size)
+    assert len(parts) == n_chunks + 2
+    content = ''.join(parts)
+    assert all(f'data-doc-id="{post.id}"' in content for post in posts)
+    assert content.rstrip().endswith('</html>')
+    assert not any(
+        '"blog_post"."text"' in query['sql'] for query in queries
+    ), 'Убедитесь, что список документов не загружает тексты публикаций.'
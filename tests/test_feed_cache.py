@@ -0,0 +1,73 @@
+import pytest
+from django.contrib.auth.models import AnonymousUser
+from django.db import connection
+from django.http import HttpResponse
+from django.test.utils import CaptureQueriesContext
+
+from blog.cache import cache_feed_for_anonymous, feed_cache_stats
+
+
+@pytest.mark.django_db
+def test_anonymous_feed_served_from_cache(
+    client, mixer, post_with_published_location
+):
+    post = post_with_published_location
+    category_url = f'/category/{post.category.slug}/'
+    for url in ('/', category_url):
+        first = client.get(url)
+        with CaptureQueriesContext(connection) as queries:
+            second = client.get(url)
+        assert second.content == first.content
+        assert len(queries) == 0, (
+            'Убедитесь, что закешированная лента отдаётся анонимному '
+            'читателю без обращений к базе данных.'
+        )
+    assert feed_cache_stats() == {'hits': 2, 'misses': 2}
+
+    mixer.blend('blog.Comment', post=post)
+    assert 'Комментарии (1)' in client.get('/').content.decode('utf-8'), (
+        'Убедитесь, что новый комментарий сбрасывает кеш лент.'
+    )
+    assert feed_cache_stats()['misses'] == 3
+
+
+@pytest.mark.django_db
+def test_authenticated_feed_not_cached(
+    user_client, post_with_published_location
+):
+    user_client.get('/')
+    user_client.get('/')
+    assert feed_cache_stats() == {'hits': 0, 'misses': 0}
+
+
+@pytest.mark.django_db
+def test_feed_cache_ignores_unused_params(
+    client, post_with_published_location
+):
+    first = client.get('/')
+    for url in ('/?utm=1', '/?page=1&x=2', '/?x=2&page=01', '/?page=junk'):
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(url)
+        assert response.content == first.content
+        assert len(queries) == 0, (
+            'Убедитесь, что ключ кеша ленты строится только из номера '
+            'страницы и курсора.'
+        )
+    assert feed_cache_stats() == {'hits': 4, 'misses': 1}
+
+
+@pytest.mark.django_db
+def test_feed_cache_replays_headers(rf):
+    @cache_feed_for_anonymous
+    def feed(request):
+        response = HttpResponse('feed', content_type='text/plain')
+        response['X-Feed'] = 'yes'
+        return response
+
+    request = rf.get('/')
+    request.user = AnonymousUser()
+    feed(request)
+    cached = feed(request)
+    assert feed_cache_stats()['hits'] == 1
+    assert cached['X-Feed'] == 'yes'
+    assert cached['Content-Type'] == 'text/plain'
@@ -0,0 +1,39 @@
+import pytest
+from django.db import connection
+
+from blog.views import get_filtered_posts
+
+
+def _explain(queryset):
+    plan = queryset[:10].explain()
+    assert not any(
+        'SCAN blog_post' in line and 'USING' not in line
+        for line in plan.splitlines()
+    ), (
+        'Убедитесь, что запрос ленты не выполняет полный просмотр '
+        f'таблицы публикаций:\n{plan}'
+    )
+    assert 'TEMP B-TREE' not in plan, (
+        'Убедитесь, что сортировка ленты выполняется по индексу:\n'
+        f'{plan}'
+    )
+    return plan
+
+
+@pytest.mark.skipif(
+    connection.vendor != 'sqlite', reason='План запроса проверяется для SQLite'
+)
+@pytest.mark.django_db
+def test_feed_queries_use_indexes(
+    many_posts_with_published_locations, published_category, user
+):
+    assert 'post_visible_feed_idx' in _explain(get_filtered_posts())
+    assert 'post_category_feed_idx' in _explain(
+        get_filtered_posts(category_slug=published_category.slug)
+    )
+    assert 'post_author_feed_idx' in _explain(
+        get_filtered_posts(profile=user)
+    )
+    assert 'post_author_feed_idx' in _explain(
+        get_filtered_posts(profile=user, published_only=False)
+    )
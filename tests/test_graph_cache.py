@@ -0,0 +1,85 @@
+import gzip
+import json
+
+import pytest
+
+from blog import graph_cache
+from blog.compact_graph import CompactGraph
+from blog.graph_processing import build_document_traversal
+
+pytestmark = pytest.mark.django_db
+
+URL = '/api/graphs/'
+
+
+def _post(client, statistic_data, docs_data, **headers):
+    return client.post(
+        URL,
+        json.dumps({'statistic_data': statistic_data, 'docs_data': docs_data}),
+        content_type='application/json',
+        **headers
+    )
+
+
+def test_graph_is_built_once_and_cached(user_client, rag_trace, monkeypatch):
+    statistic_data, docs_data = rag_trace
+    response = _post(
+        user_client, statistic_data, docs_data,
+        HTTP_ACCEPT_ENCODING='gzip, deflate'
+    )
+    assert response.status_code == 200
+    assert response['Content-Encoding'] == 'gzip'
+    assert response['X-Graph-Cache'] == 'miss'
+    payload = json.loads(gzip.decompress(response.content))
+    assert CompactGraph.from_json(payload).to_dict() == (
+        build_document_traversal(statistic_data, docs_data)
+    ), 'Убедитесь, что API отдаёт граф без потерь.'
+    assert len(payload['x']) == len(payload['y']) == len(payload['node_doc'])
+
+    def fail(*args):
+        raise AssertionError('Граф построен повторно.')
+
+    monkeypatch.setattr(graph_cache, 'build_graph', fail)
+    reordered = {key: docs_data[key] for key in reversed(list(docs_data))}
+    response = _post(user_client, statistic_data, reordered)
+    assert response.status_code == 200
+    assert response['X-Graph-Cache'] == 'hit', (
+        'Убедитесь, что повторный запрос той же трассы берёт граф из кеша.'
+    )
+    assert 'Content-Encoding' not in response
+    assert json.loads(response.content) == payload
+
+    location = response['Location']
+    response = user_client.get(location, HTTP_ACCEPT_ENCODING='gzip')
+    assert json.loads(gzip.decompress(response.content)) == payload
+    assert response['ETag'].startswith('W/'), (
+        'Убедитесь, что ETag графа слабый: тела в разных кодировках '
+        'различаются.'
+    )
+    response = user_client.get(location, HTTP_IF_NONE_MATCH=response['ETag'])
+    assert response.status_code == 304
+
+
+def test_graph_zstd(user_client, rag_trace):
+    zstandard = pytest.importorskip('zstandard')
+    response = _post(
+        user_client, *rag_trace, HTTP_ACCEPT_ENCODING='gzip;q=0.5, zstd'
+    )
+    assert response['Content-Encoding'] == 'zstd'
+    assert json.loads(zstandard.ZstdDecompressor().decompress(
+        response.content
+    ))['digest'] == graph_cache.trace_digest(*rag_trace)
+
+
+def test_graph_errors(client, user_client):
+    assert client.post(URL, '{}', content_type='application/json')[
+        'Location'
+    ].startswith('/auth/login/')
+    for body in ('{', '{}', '{"statistic_data": {}}',
+                 '{"statistic_data": [{"stage": "a"}]}'):
+        response = user_client.post(
+            URL, body, content_type='application/json'
+        )
+        assert response.status_code == 400, body
+    response = user_client.get(f'{URL}{"0" * 64}/')
+    assert response.status_code == 404
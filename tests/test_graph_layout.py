@@ -0,0 +1,98 @@
+import copy
+import time
+from itertools import combinations
+
+from blog.compact_graph import CompactGraph
+from blog.graph_layout import layered_layout, position_nodes
+from blog.graph_processing import (
+    build_document_traversal, calculate_node_positions
+)
+from fixtures.graphs import make_trace
+
+BENCHMARK_SIZES = (200, 1000, 4000)
+"""Количество документов на этапе в синтетических трассах бенчмарка."""
+
+MAX_LAYOUT_SECONDS = 1
+"""Допустимое время расчёта раскладки самого большого графа бенчмарка."""
+
+
+def _crossings(graph, positions):
+    """Число пересечений рёбер между соседними рядами."""
+    rows = {node['id']: node['y'] for node in positions}
+    xs = {node['id']: node['x'] for node in positions}
+    edges = [
+        (xs[edge['from']], xs[edge['to']], rows[edge['from']])
+        for edge in graph['edges']
+    ]
+    return sum(
+        1 for (a1, b1, y1), (a2, b2, y2) in combinations(edges, 2)
+        if y1 == y2 and (a1 - a2) * (b1 - b2) < 0
+    )
+
+
+def _two_rows_graph():
+    statistic_data = [
+        {'stage': 'a', 'processed_documents': [
+            {'id': 1}, {'id': 2}, {'id': 3}
+        ]},
+        {'stage': 'b', 'processed_documents': [
+            {'id': 4, 'ref': [3]}, {'id': 5, 'ref': [2]}, {'id': 6, 'ref': [1]}
+        ]},
+    ]
+    return build_document_traversal(statistic_data, {})
+
+
+def test_layout_removes_crossings():
+    graph = _two_rows_graph()
+    old = calculate_node_positions(copy.deepcopy(graph))
+    new = position_nodes(graph)
+    assert _crossings(graph, old) == 3
+    assert _crossings(graph, new) == 0, (
+        'Убедитесь, что раскладка упорядочивает узлы ряда по барицентру.'
+    )
+    assert 'x' not in graph['nodes']['a_1'], (
+        'Убедитесь, что position_nodes не изменяет узлы исходного графа.'
+    )
+
+
+def test_layout_matches_rows(rag_trace):
+    graph = build_document_traversal(*rag_trace)
+    old = calculate_node_positions(copy.deepcopy(graph))
+    new = position_nodes(graph)
+    assert sorted((node['id'], node['y']) for node in new) == sorted(
+        (node['id'], node['y']) for node in old
+    )
+    for y in {node['y'] for node in old}:
+        assert sorted(n['x'] for n in new if n['y'] == y) == sorted(
+            n['x'] for n in old if n['y'] == y
+        )
+    assert _crossings(graph, new) < _crossings(graph, old)
+
+
+def test_layout_without_edges():
+    graph = build_document_traversal(
+        [{'stage': 'a', 'processed_documents': [{'id': 1}, {'id': 2}]}], {}
+    )
+    assert position_nodes(graph) == calculate_node_positions(graph)
+
+
+def test_layout_benchmark():
+    rows = []
+    for size in BENCHMARK_SIZES:
+        graph = build_document_traversal(*make_trace(size))
+        started = time.perf_counter()
+        calculate_node_positions(graph)
+        old = time.perf_counter() - started
+        compact = CompactGraph.from_dict(graph)
+        started = time.perf_counter()
+        layered_layout(compact)
+        new = time.perf_counter() - started
+        rows.append((compact.node_count, compact.edge_count, old, new))
+
+    print('\n  узлов   рёбер  calculate_node_positions, с  layered_layout, с')
+    for nodes, edges, old, new in rows:
+        print(f'{nodes:>7} {edges:>7} {old:>28.4f} {new:>18.4f}')
+    assert rows[-1][-1] < MAX_LAYOUT_SECONDS, (
+        'Убедитесь, что раскладка графа из десятков тысяч узлов '
+        'рассчитывается быстрее секунды.'
+    )
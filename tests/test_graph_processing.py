@@ -0,0 +1,142 @@
+import json
+import time
+
+import pytest
+
+from blog.graph_processing import (
+    DocumentTraversalBuilder, apply_delta, build_document_traversal,
+    empty_graph
+)
+from fixtures.graphs import make_trace
+
+BENCHMARK_SIZES = (25, 100, 400)
+"""Количество документов на этапе в синтетических трассах бенчмарка."""
+
+
+def build_document_traversal_by_scan(statistic_data, docs_data):
+    """Исходная реализация: источник ссылки ищется перебором этапов."""
+    graph = {'nodes': {}, 'edges': [], 'stage_order': []}
+    for stage_data in statistic_data:
+        stage_name = stage_data['stage']
+        graph['stage_order'].append(stage_name)
+        for doc in stage_data['processed_documents']:
+            doc_id = doc['id']
+            node_key = f"{stage_name}_{doc_id}"
+            if node_key not in graph['nodes']:
+                graph['nodes'][node_key] = {
+                    'id': node_key,
+                    'original_id': doc_id,
+                    'stage': stage_name,
+                    'refs': doc.get('ref', []),
+                    'info': docs_data.get(doc_id, {})
+                }
+    for stage_idx, stage_data in enumerate(statistic_data):
+        stage_name = stage_data['stage']
+        for doc in stage_data['processed_documents']:
+            current_node_key = f"{stage_name}_{doc['id']}"
+            for ref_doc_id in doc.get('ref', []):
+                if ref_doc_id:
+                    for prev_stage_idx in range(stage_idx):
+                        prev_stage = statistic_data[prev_stage_idx]
+                        for prev_doc in prev_stage['processed_documents']:
+                            if prev_doc['id'] == ref_doc_id:
+                                prev_node_key = (
+                                    f"{prev_stage['stage']}_{ref_doc_id}"
+                                )
+                                graph['edges'].append({
+                                    'id': (
+                                        f"{prev_node_key}_{current_node_key}"
+                                    ),
+                                    'from': prev_node_key,
+                                    'to': current_node_key
+                                })
+                                break
+    return graph
+
+
+def test_traversal_matches_scan(rag_trace):
+    assert build_document_traversal(*rag_trace) == (
+        build_document_traversal_by_scan(*rag_trace)
+    ), 'Убедитесь, что индексированный обход строит тот же граф.'
+
+
+@pytest.mark.parametrize('statistic_data', (
+    [],
+    [{'stage': 'a', 'processed_documents': []}],
+    [
+        {'stage': 'a', 'processed_documents': [{'id': 1}, {'id': 2}]},
+        {'stage': 'a', 'processed_documents': [{'id': 1, 'ref': [1, 3]}]},
+        {'stage': 'b', 'processed_documents': [{'id': 2, 'ref': [1, 2, 1]}]},
+    ],
+))
+def test_traversal_edge_cases(statistic_data):
+    assert build_document_traversal(statistic_data, {}) == (
+        build_document_traversal_by_scan(statistic_data, {})
+    )
+
+
+def test_builder_deltas(rag_trace):
+    statistic_data, docs_data = rag_trace
+    builder = DocumentTraversalBuilder(docs_data)
+    graph = empty_graph()
+    for stage_data in statistic_data:
+        delta = builder.add_stage(stage_data)
+        assert delta['stage'] == stage_data['stage']
+        assert not set(delta['nodes']) & set(graph['nodes']), (
+            'Убедитесь, что приращение содержит только новые узлы.'
+        )
+        apply_delta(graph, delta)
+    assert graph == build_document_traversal_by_scan(*rag_trace)
+
+
+def test_builder_resume(rag_trace):
+    statistic_data, docs_data = rag_trace
+    expected = list(
+        DocumentTraversalBuilder(docs_data).add_stages(statistic_data)
+    )
+
+    builder = DocumentTraversalBuilder(docs_data)
+    deltas = list(builder.add_stages(statistic_data[:2]))
+    state = json.loads(json.dumps(builder.get_state()))
+    resumed = DocumentTraversalBuilder.from_state(state, docs_data)
+    deltas += resumed.add_stages(statistic_data[2:])
+    assert deltas == expected, (
+        'Убедитесь, что восстановленный построитель продолжает граф '
+        'с того же места.'
+    )
+
+    state['version'] = 0
+    with pytest.raises(ValueError):
+        DocumentTraversalBuilder.from_state(state)
+
+
+def test_builder_keeps_int_ids():
+    builder = DocumentTraversalBuilder()
+    builder.add_stage({'stage': 'a', 'processed_documents': [{'id': 1}]})
+    state = json.loads(json.dumps(builder.get_state()))
+    delta = DocumentTraversalBuilder.from_state(state).add_stage(
+        {'stage': 'b', 'processed_documents': [{'id': 2, 'ref': [1]}]}
+    )
+    assert [edge['from'] for edge in delta['edges']] == ['a_1']
+
+
+def test_traversal_benchmark():
+    rows = []
+    for size in BENCHMARK_SIZES:
+        trace = make_trace(size)
+        started = time.perf_counter()
+        expected = build_document_traversal_by_scan(*trace)
+        scan = time.perf_counter() - started
+        started = time.perf_counter()
+        graph = build_document_traversal(*trace)
+        indexed = time.perf_counter() - started
+        assert graph == expected
+        rows.append((size, len(graph['edges']), scan, indexed))
+
+    print('\nдокументов/этап  рёбер  перебор, с  индекс, с')
+    for size, edges, scan, indexed in rows:
+        print(f'{size:>15} {edges:>6} {scan:>11.4f} {indexed:>10.4f}')
+    _, _, scan, indexed = rows[-1]
+    assert indexed < scan, (
+        'Убедитесь, что индексированный обход быстрее перебора этапов.'
+    )
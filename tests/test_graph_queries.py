@@ -0,0 +1,132 @@
+import gzip
+import json
+
+import pytest
+from django.core.cache import cache
+
+from blog import graph_cache
+from blog.compact_graph import CompactGraph
+from blog.graph_processing import build_document_traversal
+from blog.graph_queries import (
+    ancestors, collapse_single_parent, descendants, doc_lineage,
+    top_referenced
+)
+
+STATISTIC_DATA = [
+    {'stage': 'a', 'processed_documents': [{'id': 1}, {'id': 2}]},
+    {'stage': 'b', 'processed_documents': [
+        {'id': 3, 'ref': [1]}, {'id': 4, 'ref': [1, 2]}
+    ]},
+    {'stage': 'c', 'processed_documents': [
+        {'id': 5, 'ref': [3]}, {'id': 6, 'ref': [4]}
+    ]},
+]
+"""Трасса, узлы которой получают номера a_1=0, a_2=1, b_3=2, b_4=3,
+c_5=4, c_6=5."""
+
+
+@pytest.fixture
+def compact():
+    return CompactGraph.from_traversal(STATISTIC_DATA, {})
+
+
+def test_lineage(compact):
+    assert sorted(ancestors(compact, [5])) == [0, 1, 3]
+    assert sorted(descendants(compact, [0])) == [2, 3, 4, 5]
+    assert doc_lineage(compact, 6) == [0, 1, 3, 5]
+    assert doc_lineage(compact, 1, 'descendants', depth=1) == [0, 2, 3]
+    assert doc_lineage(compact, 4, 'ancestors') == [0, 1, 3]
+    assert doc_lineage(compact, 'нет') == []
+    with pytest.raises(ValueError):
+        doc_lineage(compact, 1, 'up')
+
+
+def test_top_referenced(compact):
+    assert top_referenced(compact, 1) == {'a': [0], 'b': [2], 'c': [4]}
+    assert top_referenced(compact, 5)['a'] == [0, 1]
+
+
+def test_cached_graph_has_ranking():
+    """Граф из кеша отдаёт top без повторной сортировки узлов."""
+    digest, _, _ = graph_cache.get_or_build_graph(STATISTIC_DATA, {})
+    for restored_from_json in (False, True):
+        if restored_from_json:
+            cache.delete(graph_cache.GRAPH_INDEX_KEY.format(digest=digest))
+        compact, _, _ = graph_cache.get_graph_index(digest)
+        assert 'ranked' in compact._indexes, (
+            'Убедитесь, что ранжирование узлов строится вместе '
+            'с остальными индексами до кеширования графа.'
+        )
+        assert top_referenced(compact, 1) == {'a': [0], 'b': [2], 'c': [4]}
+
+
+def test_collapse_single_parent(compact):
+    nodes, edges, collapsed = collapse_single_parent(compact)
+    assert nodes == [0, 1, 3]
+    assert edges == [(0, 3), (1, 3)]
+    assert collapsed == {0: 2, 1: 0, 3: 1}
+    sub = compact.subgraph(nodes, edges).to_dict()
+    assert list(sub['nodes']) == ['a_1', 'a_2', 'b_4']
+    assert [edge['id'] for edge in sub['edges']] == ['a_1_b_4', 'a_2_b_4']
+
+
+def test_queries_on_trace(rag_trace):
+    graph = build_document_traversal(*rag_trace)
+    compact = CompactGraph.from_dict(graph)
+    keys = list(graph['nodes'])
+    node = compact.edge_to[-1]
+    parents = {
+        edge['from'] for edge in graph['edges'] if edge['to'] == keys[node]
+    }
+    assert {keys[n] for n in ancestors(compact, [node], depth=1)} == parents
+
+    nodes = doc_lineage(compact, compact.doc_ids[compact.node_doc[node]])
+    sub = compact.subgraph(nodes).to_dict()
+    assert set(sub['nodes']) == {keys[n] for n in nodes}
+    assert sorted(edge['id'] for edge in sub['edges']) == sorted(
+        edge['id'] for edge in graph['edges']
+        if edge['from'] in sub['nodes'] and edge['to'] in sub['nodes']
+    ), 'Убедитесь, что подграф содержит все рёбра между его узлами.'
+
+    nodes, edges, collapsed = collapse_single_parent(compact)
+    assert len(nodes) + sum(collapsed.values()) == compact.node_count
+
+
+@pytest.mark.django_db
+def test_graph_endpoint_subgraphs(user_client):
+    response = user_client.post(
+        '/api/graphs/',
+        json.dumps({'statistic_data': STATISTIC_DATA, 'docs_data': {}}),
+        content_type='application/json'
+    )
+    location = response['Location']
+
+    def get(**params):
+        return user_client.get(location, params, HTTP_ACCEPT_ENCODING='gzip')
+
+    def payload(response):
+        assert response.status_code == 200
+        return json.loads(gzip.decompress(response.content))
+
+    lineage = payload(get(doc='6'))
+    assert lineage['nodes'] == [0, 1, 3, 5]
+    assert list(CompactGraph.from_json(lineage).to_dict()['nodes']) == [
+        'a_1', 'a_2', 'b_4', 'c_6'
+    ]
+    assert len(lineage['x']) == 4
+    assert payload(get(doc='1', direction='ancestors'))['nodes'] == [0]
+    assert payload(get(top='1'))['nodes'] == [0, 2, 4]
+    collapsed = payload(get(collapse='1'))
+    assert collapsed['collapsed'] == [2, 0, 1]
+    assert collapsed['edge_from'] == [0, 1]
+
+    response = get(doc='6')
+    assert response['ETag'] != user_client.get(location)['ETag']
+    response = user_client.get(
+        location, {'doc': '6'}, HTTP_IF_NONE_MATCH=response['ETag']
+    )
+    assert response.status_code == 304
+
+    for params in ({'doc': '1', 'top': '1'}, {'top': 'x'},
+                   {'doc': '1', 'direction': 'up'}):
+        assert get(**params).status_code == 400, params
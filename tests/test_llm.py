@@ -0,0 +1,254 @@
+import threading
+import time
+
+import pytest
+
+from blog.llm import (
+    CompletionBatcher, CompletionError, CompletionPool, CompletionTimeout,
+    StubBackend
+)
+
+DELAY = 0.05
+"""Длительность запроса заглушки в тестах, в секундах."""
+
+
+class CountingLimiter:
+    """Общий ограничитель, запоминающий наибольшую параллельность."""
+
+    def __init__(self):
+        self.active = 0
+        self.peak = 0
+        self.acquired = 0
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        with self._lock:
+            self.active += 1
+            self.acquired += 1
+            self.peak = max(self.peak, self.active)
+
+    def __exit__(self, *exc_info):
+        with self._lock:
+            self.active -= 1
+
+
+@pytest.mark.parametrize('concurrency', (1, 4))
+def test_throughput_scales_with_concurrency(concurrency):
+    limiter = CountingLimiter()
+    pool = CompletionPool(
+        StubBackend(delay=DELAY), concurrency=concurrency, timeout=1,
+        retries=0, limiter=lambda tenant: limiter
+    )
+    requests = 8
+    started = time.perf_counter()
+    results = pool.complete_many(
+        (f'prompt {number}', number) for number in range(requests)
+    )
+    elapsed = time.perf_counter() - started
+    pool.shutdown()
+
+    assert [result['id'] for result in results] == list(range(requests))
+    assert limiter.peak == concurrency, (
+        'Убедитесь, что пул выполняет не больше concurrency запросов сразу.'
+    )
+    serial = requests * DELAY
+    assert serial / concurrency * 0.9 <= elapsed < serial / concurrency + 0.2
+
+
+def test_retries_after_failures():
+    backend = StubBackend(fail_times=2)
+    pool = CompletionPool(backend, concurrency=1, retries=2, backoff=0)
+    assert pool.complete('prompt', 1)['id'] == 1
+    assert backend.calls == 3
+
+    backend = StubBackend(fail_times=5)
+    pool = CompletionPool(backend, concurrency=1, retries=2, backoff=0)
+    with pytest.raises(CompletionError):
+        pool.complete('prompt', 1)
+    assert backend.calls == 3
+
+
+def test_timeout():
+    pool = CompletionPool(
+        StubBackend(delay=1), concurrency=2, timeout=DELAY, retries=1,
+        backoff=0
+    )
+    started = time.perf_counter()
+    with pytest.raises(CompletionTimeout):
+        pool.submit('prompt', 1).result()
+    assert time.perf_counter() - started < 0.5, (
+        'Убедитесь, что запрос прерывается по таймауту.'
+    )
+
+
+class HangingBackend(StubBackend):
+    """Бэкенд, игнорирующий таймаут: первые hang_times вызовов
+    зависают до release."""
+
+    def __init__(self, hang_times=None):
+        super().__init__()
+        self.hang_times = hang_times
+        self.started = 0
+        self.released = threading.Event()
+
+    def complete(self, prompt, request_id, timeout):
+        with self._lock:
+            self.started += 1
+            hangs = (
+                self.hang_times is None or self.started <= self.hang_times
+            )
+        if hangs:
+            self.released.wait()
+        return super().complete(prompt, request_id, timeout)
+
+
+def test_pool_enforces_timeout():
+    backend = HangingBackend()
+    limiter = CountingLimiter()
+    pool = CompletionPool(
+        backend, concurrency=1, timeout=DELAY, retries=1, backoff=0,
+        limiter=lambda tenant: limiter
+    )
+    started = time.perf_counter()
+    with pytest.raises(CompletionTimeout):
+        pool.complete('prompt', 1)
+    assert time.perf_counter() - started < 0.5, (
+        'Убедитесь, что пул прерывает попытку по таймауту, даже если '
+        'бэкенд его игнорирует.'
+    )
+    assert limiter.acquired == 2 and limiter.active == 0, (
+        'Убедитесь, что ограничитель освобождается после таймаута.'
+    )
+    backend.released.set()
+    pool.shutdown()
+
+
+def test_pool_survives_hung_calls():
+    concurrency = 2
+    backend = HangingBackend(hang_times=concurrency + 1)
+    pool = CompletionPool(
+        backend, concurrency=concurrency, timeout=DELAY, retries=0
+    )
+    for number in range(concurrency + 1):
+        with pytest.raises(CompletionTimeout):
+            pool.complete('prompt', number)
+    assert pool.complete('prompt', 'ok')['id'] == 'ok', (
+        'Убедитесь, что зависшие вызовы бэкенда не блокируют '
+        'следующие запросы пула.'
+    )
+    assert backend.started == concurrency + 2
+    backend.released.set()
+    pool.shutdown()
+
+
+def test_batcher_groups_burst():
+    backend = StubBackend(delay=DELAY)
+    limiter = CountingLimiter()
+    pool = CompletionPool(
+        backend, concurrency=2, timeout=1, retries=0,
+        limiter=lambda tenant: limiter
+    )
+    batcher = CompletionBatcher(pool, max_size=4, max_wait=1)
+    started = time.perf_counter()
+    futures = [batcher.submit('prompt', number) for number in range(8)]
+    results = [future.result() for future in futures]
+    elapsed = time.perf_counter() - started
+    batcher.shutdown()
+    pool.shutdown()
+
+    assert [result['id'] for result in results] == list(range(8))
+    assert batcher.batches == backend.calls == limiter.acquired == 2, (
+        'Убедитесь, что полные пакеты отправляются одним вызовом LLM.'
+    )
+    assert elapsed < 0.5, (
+        'Убедитесь, что полный пакет отправляется без ожидания max_wait.'
+    )
+
+
+def test_batcher_flushes_after_wait():
+    backend = StubBackend()
+    pool = CompletionPool(backend, concurrency=1, retries=0)
+    batcher = CompletionBatcher(pool, max_size=10, max_wait=DELAY)
+    futures = [
+        batcher.submit('prompt', 1, 'chat'),
+        batcher.submit('prompt', 2, 'chat'),
+        batcher.submit('prompt', 3, 'bulk'),
+    ]
+    assert [future.result(timeout=1)['id'] for future in futures] == [1, 2, 3]
+    assert batcher.batches == backend.calls == 2, (
+        'Убедитесь, что запросы разных арендаторов идут разными пакетами.'
+    )
+    assert batcher.complete('prompt', 4)['id'] == 4
+    batcher.shutdown()
+    pool.shutdown()
+
+
+def test_batcher_fans_out_errors():
+    backend = StubBackend(fail_times=5)
+    pool = CompletionPool(backend, concurrency=1, retries=1, backoff=0)
+    batcher = CompletionBatcher(pool, max_size=3, max_wait=1)
+    futures = [batcher.submit('prompt', number) for number in range(3)]
+    for future in futures:
+        with pytest.raises(CompletionError):
+            future.result(timeout=1)
+    assert backend.calls == 2
+    batcher.shutdown()
+    pool.shutdown()
+
+
+def test_batcher_shutdown_flushes_pending():
+    pool = CompletionPool(StubBackend(), concurrency=1, retries=0)
+    batcher = CompletionBatcher(pool, max_size=10, max_wait=60)
+    future = batcher.submit('prompt', 1)
+    batcher.shutdown()
+    assert future.result(timeout=1)['id'] == 1
+    with pytest.raises(RuntimeError):
+        batcher.submit('prompt', 2)
+    pool.shutdown()
+
+
+class ShortBatchBackend(StubBackend):
+    """Бэкенд, теряющий последний результат пакета."""
+
+    def complete_batch(self, items, timeout):
+        return super().complete_batch(items, timeout)[:-1]
+
+
+def test_batcher_skips_cancelled_requests():
+    backend = StubBackend()
+    pool = CompletionPool(backend, concurrency=1, retries=0)
+    batcher = CompletionBatcher(pool, max_size=3, max_wait=1)
+    futures = [batcher.submit('prompt', number) for number in range(2)]
+    assert futures[0].cancel()
+    futures.append(batcher.submit('prompt', 2))
+    assert futures[2].result(timeout=1)['id'] == 2, (
+        'Убедитесь, что отмена одного запроса не мешает остальным.'
+    )
+    assert futures[1].result(timeout=1)['id'] == 1
+    assert not futures[1].cancel()
+
+    batcher.submit('prompt', 3).cancel()
+    batcher.shutdown()
+    pool.shutdown()
+    assert batcher.batches == backend.calls == 1, (
+        'Убедитесь, что отменённые запросы не отправляются в LLM.'
+    )
+
+
+def test_batcher_rejects_short_batch_result():
+    pool = CompletionPool(ShortBatchBackend(), concurrency=1, retries=0)
+    batcher = CompletionBatcher(pool, max_size=2, max_wait=1)
+    futures = [batcher.submit('prompt', number) for number in range(2)]
+    for future in futures:
+        with pytest.raises(CompletionError):
+            future.result(timeout=1)
+    batcher.shutdown()
+    pool.shutdown()
+
+
+def test_batcher_single_item_batches():
+    pool = CompletionPool(StubBackend(), concurrency=1, retries=0)
+    batcher = CompletionBatcher(pool, max_size=1, max_wait=1)
+    assert batcher.complete('prompt', 1)['id'] == 1
+    batcher.shutdown()
+    pool.shutdown()
@@ -0,0 +1,116 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+import core.blog_settings
+
+
+@pytest.mark.django_db
+def test_api_sparse_fieldsets(client, many_posts_with_published_locations):
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get('/api/v1/posts/', {'fields': 'id,title'})
+    assert response.status_code == 200
+    assert all(
+        set(item) == {'id', 'title'} for item in response.json()['results']
+    ), 'Убедитесь, что параметр fields ограничивает поля ответа.'
+    assert not any(
+        '"blog_post"."text"' in query['sql'] for query in queries
+    ), 'Убедитесь, что параметр fields ограничивает выбираемые столбцы.'
+
+    response = client.get('/api/v1/posts/', {'fields': 'id,password'})
+    assert response.status_code == 400
+
+
+@pytest.mark.django_db
+def test_api_cursor_pagination(client, many_posts_with_published_locations):
+    posts = many_posts_with_published_locations
+    expected = [
+        post.id for post in sorted(
+            posts, key=lambda post: (post.pub_date, post.id), reverse=True
+        )
+    ]
+
+    seen = []
+    url, params = '/api/v1/posts/', {'pagination': 'cursor', 'fields': 'id'}
+    while url:
+        with CaptureQueriesContext(connection) as queries:
+            data = client.get(url, params).json()
+        assert not any(
+            'COUNT(' in query['sql'].upper() for query in queries
+        ), 'Убедитесь, что курсорная пагинация API не выполняет COUNT(*).'
+        seen.extend(item['id'] for item in data['results'])
+        url, params = data['next'], None
+
+    assert seen == expected
+
+
+def _sync(client, since=None):
+    changed, deleted = set(), set()
+    while True:
+        params = {'since': since} if since else {}
+        data = client.get('/api/v1/posts/changes/', params).json()
+        changed.update(item['id'] for item in data['changes'])
+        deleted.update(data['deleted'])
+        since = data['watermark']
+        if not data['has_more']:
+            return changed, deleted, since
+
+
+@pytest.mark.django_db
+def test_api_changes_feed(
+    client, mixer, monkeypatch, many_posts_with_published_locations
+):
+    monkeypatch.setattr(core.blog_settings, 'CHANGES_BATCH_SIZE', 3)
+    posts = many_posts_with_published_locations
+
+    changed, deleted, watermark = _sync(client)
+    assert changed == {post.id for post in posts} and not deleted, (
+        'Убедитесь, что первая синхронизация отдаёт все публикации.'
+    )
+    assert _sync(client, watermark)[:2] == (set(), set())
+
+    edited, commented, removed, partially_edited = posts[:4]
+    edited.title = 'Изменённый заголовок'
+    edited.save()
+    partially_edited.text = 'Изменённый текст'
+    partially_edited.save(update_fields=('text',))
+    mixer.blend('blog.Comment', post=commented)
+    removed_id = removed.id
+    removed.delete()
+
+    changed, deleted, _ = _sync(client, watermark)
+    assert changed == {edited.id, commented.id, partially_edited.id}, (
+        'Убедитесь, что лента изменений отдаёт только изменённые публикации.'
+    )
+    assert deleted == {removed_id}, (
+        'Убедитесь, что лента изменений отдаёт id удалённых публикаций.'
+    )
+
+    response = client.get('/api/v1/posts/changes/', {'since': 'вчера'})
+    assert response.status_code == 400
+
+
+@pytest.mark.django_db
+def test_api_post_detail_not_modified(
+    client, post_with_published_location, django_assert_num_queries
+):
+    post = post_with_published_location
+    url = f'/api/v1/posts/{post.id}/'
+    response = client.get(url)
+    etag = response['ETag']
+
+    with django_assert_num_queries(1):
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 304
+
+    response = client.get(url, {'fields': 'id'}, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200, (
+        'Убедитесь, что ETag зависит от набора полей ответа.'
+    )
+
+    post.title = 'Новый заголовок'
+    post.save()
+    response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200
+    assert response.json()['title'] == 'Новый заголовок'
+    assert client.get('/api/v1/posts/abc/').status_code == 404
@@ -0,0 +1,130 @@
+import json
+import time
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from blog.models import Post
+
+BENCHMARK_ROWS = 200
+
+
+def _item(user, category, location, number=0, **extra):
+    item = {
+        'title': f'Заголовок {number}',
+        'text': f'Текст публикации номер {number}',
+        'pub_date': (timezone.now() - timezone.timedelta(days=1)).isoformat(),
+        'author': user.id,
+        'category': category.id,
+        'location': location.id,
+    }
+    item.update(extra)
+    return item
+
+
+@pytest.mark.django_db
+def test_bulk_create_and_update(
+    client, user, published_category, published_location,
+    post_with_published_location
+):
+    post = post_with_published_location
+    items = [
+        _item(user, published_category, published_location, 1),
+        _item(user, published_category, published_location, 2, title='Ой.'),
+        {'id': post.id, 'text': 'Новый текст поста'},
+        {'id': 10 ** 9, 'title': 'Нет такого поста'},
+        _item(user, published_category, published_location, 3, author=0),
+    ]
+    with CaptureQueriesContext(connection) as queries:
+        response = client.post(
+            '/api/v1/posts/bulk/', items, content_type='application/json'
+        )
+    assert response.status_code == 200
+    data = response.json()
+    statuses = [result['status'] for result in data['results']]
+    assert statuses == ['created', 'error', 'updated', 'error', 'error']
+    assert (data['created'], data['updated'], data['errors']) == (1, 1, 3)
+    assert 'title' in data['results'][1]['errors'], (
+        'Убедитесь, что пакетная загрузка проверяет заголовок '
+        'валидатором title_without_dot.'
+    )
+    assert 'author' in data['results'][4]['errors']
+
+    created = Post.objects.get(id=data['results'][0]['id'])
+    assert created.is_visible and created.excerpt
+    post.refresh_from_db()
+    assert post.text == 'Новый текст поста'
+    assert post.excerpt == 'Новый текст поста'
+    assert post.updated_at > post.created_at
+    assert len(queries) < 15, (
+        'Убедитесь, что пакет проверяется и записывается фиксированным '
+        'числом запросов к БД.'
+    )
+
+
+@pytest.mark.django_db
+def test_bulk_ndjson(client, user, published_category, published_location):
+    lines = '\n'.join(
+        json.dumps(_item(user, published_category, published_location, n))
+        for n in range(3)
+    )
+    response = client.post(
+        '/api/v1/posts/bulk/', lines + '\n\n',
+        content_type='application/x-ndjson'
+    )
+    assert response.status_code == 200
+    assert response.json()['created'] == 3
+    assert Post.objects.count() == 3
+
+    response = client.post(
+        '/api/v1/posts/bulk/', lines + '\n{oops',
+        content_type='application/x-ndjson'
+    )
+    assert response.status_code == 400
+    assert Post.objects.count() == 3, (
+        'Убедитесь, что ошибка разбора потока отменяет всю загрузку.'
+    )
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    'body', ({'title': 'Один пост'}, 5, 'Один пост', True, None)
+)
+def test_bulk_rejects_non_array(client, body):
+    response = client.post(
+        '/api/v1/posts/bulk/', json.dumps(body),
+        content_type='application/json'
+    )
+    assert response.status_code == 400
+
+
+@pytest.mark.django_db
+def test_bulk_is_faster_than_single_item_api(
+    client, user, published_category, published_location
+):
+    items = [
+        _item(user, published_category, published_location, n)
+        for n in range(BENCHMARK_ROWS)
+    ]
+
+    started = time.perf_counter()
+    for item in items:
+        response = client.post(
+            '/api/v1/posts/', item, content_type='application/json'
+        )
+        assert response.status_code == 201
+    single = BENCHMARK_ROWS / (time.perf_counter() - started)
+
+    started = time.perf_counter()
+    response = client.post(
+        '/api/v1/posts/bulk/', items, content_type='application/json'
+    )
+    bulk = BENCHMARK_ROWS / (time.perf_counter() - started)
+    assert response.json()['created'] == BENCHMARK_ROWS
+
+    print(f'\nПо одному: {single:.0f} строк/с, пакетом: {bulk:.0f} строк/с')
+    assert bulk > single, (
+        'Убедитесь, что пакетная загрузка быстрее загрузки по одному посту.'
+    )
@@ -0,0 +1,45 @@
+import pytest
+
+CARD_BODY_TEMPLATE = 'includes/post_card_body.html'
+
+
+def _rendered_cards(response):
+    return [
+        template for template in response.templates
+        if template.name == CARD_BODY_TEMPLATE
+    ]
+
+
+@pytest.mark.django_db
+def test_warm_feed_skips_card_rendering(
+    user_client, post_with_published_location
+):
+    post = post_with_published_location
+    assert _rendered_cards(user_client.get('/'))
+    assert not _rendered_cards(user_client.get('/')), (
+        'Убедитесь, что карточки постов берутся из кеша при повторном '
+        'открытии ленты.'
+    )
+
+    for related in (post.category, post.location, post.author, post):
+        related.save()
+        assert _rendered_cards(user_client.get('/')), (
+            'Убедитесь, что изменение связанного объекта '
+            f'`{type(related).__name__}` сбрасывает кеш карточки поста.'
+        )
+
+
+@pytest.mark.django_db
+def test_card_cache_shows_fresh_data(
+    user_client, mixer, post_with_published_location
+):
+    post = post_with_published_location
+    user_client.get('/')
+
+    post.category.title = 'Обновлённая категория'
+    post.category.save()
+    mixer.blend('blog.Comment', post=post)
+
+    content = user_client.get('/').content.decode('utf-8')
+    assert 'Обновлённая категория' in content
+    assert 'Комментарии (1)' in content
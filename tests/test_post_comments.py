@@ -0,0 +1,49 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+import core.blog_settings
+
+PAGE_SIZE = core.blog_settings.VIEWED_COMMENTS
+
+
+@pytest.mark.django_db
+def test_comments_paginated_on_post_detail(
+    client, mixer, post_with_published_location
+):
+    post = post_with_published_location
+    comments = mixer.cycle(PAGE_SIZE + 5).blend('blog.Comment', post=post)
+    url = f'/posts/{post.id}/'
+
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(url)
+    page = response.context['comments']
+    assert len(page) == PAGE_SIZE, (
+        'Убедитесь, что на странице поста выводится ограниченное '
+        'количество комментариев.'
+    )
+    assert len(queries) < PAGE_SIZE, (
+        'Убедитесь, что авторы комментариев загружаются вместе с '
+        'комментариями, без отдельного запроса на каждый комментарий.'
+    )
+
+    response = client.get(f'{url}comments/', {'cursor': page.next_cursor})
+    data = response.json()
+    assert data['success'] and data['next_cursor'] is None
+    assert all(
+        f'name="comment_{comment.id}"' in data['html']
+        for comment in comments[PAGE_SIZE:]
+    ), (
+        'Убедитесь, что эндпоинт комментариев отдаёт следующую порцию.'
+    )
+
+
+@pytest.mark.django_db
+def test_comments_fragment_hidden_for_unpublished_post(
+    client, unpublished_posts_with_published_locations
+):
+    post = unpublished_posts_with_published_locations[0]
+    assert client.get(f'/posts/{post.id}/comments/').status_code == 404
+    assert client.get(
+        f'/posts/{post.id}/comments/', {'cursor': 'broken'}
+    ).status_code == 404
@@ -0,0 +1,89 @@
+from datetime import timedelta
+
+import pytest
+from django.utils import timezone
+from django.utils.http import http_date
+
+POST_DETAIL_QUERIES = 3
+"""Валидаторы ETag, пост со связанными объектами и первая страница
+комментариев."""
+
+NOT_MODIFIED_QUERIES = 1
+"""Только валидаторы ETag."""
+
+AUTH_QUERIES = 2
+"""Загрузка сессии и пользователя для авторизованного клиента."""
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('n_comments', (0, 1, 30))
+def test_post_detail_query_count(
+    client, user_client, mixer, post_with_published_location,
+    django_assert_num_queries, n_comments
+):
+    post = post_with_published_location
+    mixer.cycle(n_comments).blend('blog.Comment', post=post)
+    url = f'/posts/{post.id}/'
+
+    with django_assert_num_queries(POST_DETAIL_QUERIES):
+        client.get(url)
+    with django_assert_num_queries(POST_DETAIL_QUERIES + AUTH_QUERIES):
+        user_client.get(url)
+
+
+@pytest.mark.django_db
+def test_post_detail_not_modified(
+    client, mixer, post_with_published_location, django_assert_num_queries
+):
+    post = post_with_published_location
+    url = f'/posts/{post.id}/'
+    response = client.get(url)
+    etag = response['ETag']
+    assert response['Last-Modified']
+
+    with django_assert_num_queries(NOT_MODIFIED_QUERIES):
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 304
+    assert not response.content
+    with django_assert_num_queries(NOT_MODIFIED_QUERIES):
+        response = client.get(
+            url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']
+        )
+    assert response.status_code == 304
+
+    mixer.blend('blog.Comment', post=post)
+    response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200, (
+        'Убедитесь, что новый комментарий меняет ETag страницы поста.'
+    )
+    assert response['ETag'] != etag
+
+    post.category.is_published = False
+    post.category.save()
+    response = client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+    assert response.status_code == 404
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('hidden', (
+    {'is_published': False},
+    {'pub_date': timezone.now() + timedelta(days=1)},
+    {'category__is_published': False},
+))
+def test_post_detail_not_modified_hides_invisible_posts(
+    client, user_client, mixer, user, hidden
+):
+    post = mixer.blend(
+        'blog.Post', author=user,
+        **{'category__is_published': True, 'is_published': True, **hidden}
+    )
+    url = f'/posts/{post.id}/'
+    since = http_date((timezone.now() + timedelta(days=30)).timestamp())
+
+    response = client.get(url, HTTP_IF_MODIFIED_SINCE=since)
+    assert response.status_code == 404, (
+        'Убедитесь, что условный запрос к скрытому посту не выдаёт 304 '
+        'никому, кроме автора.'
+    )
+    response = user_client.get(url, HTTP_IF_MODIFIED_SINCE=since)
+    assert response.status_code == 304
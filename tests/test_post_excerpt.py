@@ -0,0 +1,40 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from blog.models import Post
+
+LONG_TEXT = ' '.join(f'слово{i}' for i in range(100))
+
+
+@pytest.mark.django_db
+def test_excerpt_computed_on_save(post_with_published_location):
+    post = post_with_published_location
+    post.text = LONG_TEXT
+    post.save(update_fields=('text',))
+    post.refresh_from_db()
+    assert post.excerpt == ' '.join(LONG_TEXT.split()[:10]) + '…', (
+        'Убедитесь, что при сохранении поста формируется анонс '
+        'из первых слов текста.'
+    )
+
+
+@pytest.mark.django_db
+def test_fill_excerpts_command(post_with_published_location):
+    Post.objects.update(excerpt='')
+    call_command('fill_excerpts', stdout=StringIO())
+    post_with_published_location.refresh_from_db()
+    assert post_with_published_location.excerpt
+
+
+@pytest.mark.django_db
+def test_feed_does_not_load_full_text(client, post_with_published_location):
+    with CaptureQueriesContext(connection) as queries:
+        content = client.get('/').content.decode('utf-8')
+    assert post_with_published_location.excerpt in content
+    assert not any(
+        '"blog_post"."text"' in query['sql'] for query in queries
+    ), 'Убедитесь, что лента не загружает полный текст публикаций.'
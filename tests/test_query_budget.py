@@ -0,0 +1,149 @@
+"""Бюджет запросов к БД и времени ответа для всех страниц блога.
+
+Каждый маршрут из blog.urls (и API публикаций) запрашивается дважды:
+при небольшом и при увеличенном наполнении базы. Число SQL-запросов
+не должно зависеть от количества постов, комментариев и пользователей.
+Результаты замеров сохраняются в JSON-отчёт во временном каталоге теста;
+чтобы сохранить отчёт в другом месте, укажите путь к нему в переменной
+окружения QUERY_BUDGET_REPORT.
+"""
+import json
+import os
+import time
+from pathlib import Path
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+
+from blog import urls as blog_urls
+
+N_SMALL = 3
+N_LARGE = 15
+
+REPORT_ENV = 'QUERY_BUDGET_REPORT'
+"""Переменная окружения с путём к JSON-отчёту о замерах."""
+
+SKIPPED_ROUTES = {
+    'new_task': 'запускает задачу Celery, нужен брокер',
+    'check_status': 'читает результат задачи Celery, нужен бэкенд',
+}
+
+
+def _seed(mixer, n, user, target, category, locations):
+    User = get_user_model()
+    authors = mixer.cycle(n).blend(User)
+    posts = mixer.cycle(n).blend(
+        'blog.Post',
+        author=mixer.sequence(*authors),
+        category=category,
+        location=mixer.sequence(*locations),
+    )
+    mixer.cycle(n).blend(
+        'blog.Post', author=user, category=category,
+        location=mixer.sequence(*locations),
+    )
+    mixer.cycle(n).blend(
+        'blog.Comment', post=target, author=mixer.sequence(*authors)
+    )
+    tags = mixer.cycle(n).blend('blog.Tag')
+    for post in posts:
+        post.tags.set(tags)
+    mixer.cycle(n).blend(
+        'blog.Comment', post=mixer.sequence(*posts),
+        author=mixer.sequence(*authors)
+    )
+
+
+def _route_urls(user, target, comment, category, tag):
+    """Адреса всех маршрутов blog.urls и API публикаций."""
+    kwargs_by_name = {
+        'post_detail': {'post_id': target.id},
+        'post_comments': {'post_id': target.id},
+        'edit_post': {'post_id': target.id},
+        'delete_post': {'post_id': target.id},
+        'add_comment': {'post_id': target.id},
+        'edit_comment': {'post_id': target.id, 'comment_id': comment.id},
+        'delete_comment': {'post_id': target.id, 'comment_id': comment.id},
+        'category_posts': {'category_slug': category.slug},
+        'profile': {'author': user.username},
+        'toggle_tag_status': {'tag_id': tag.id},
+        'delete_tag': {'tag_id': tag.id},
+        'graph_detail': {'digest': '0' * 64},
+    }
+    urls = {}
+    for pattern in blog_urls.urlpatterns:
+        name = pattern.name or str(pattern.pattern)
+        if name in SKIPPED_ROUTES:
+            continue
+        kwargs = kwargs_by_name.get(name, {})
+        url = '/' + str(pattern.pattern)
+        for key, value in kwargs.items():
+            for converter in ('int', 'slug'):
+                url = url.replace(f'<{converter}:{key}>', str(value))
+        assert '<' not in url, f'Не заданы параметры маршрута `{name}`.'
+        urls[name] = url
+    urls['api_post_list'] = '/api/v1/posts/'
+    urls['api_post_detail'] = f'/api/v1/posts/{target.id}/'
+    return urls
+
+
+def _measure(user, urls):
+    results = {}
+    for name, url in urls.items():
+        client = Client()
+        client.force_login(user)
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            response = client.get(url)
+            if response.streaming:
+                b''.join(response.streaming_content)
+            elapsed = time.perf_counter() - started
+        assert response.status_code < 500, f'{name}: {url}'
+        results[name] = {
+            'url': url,
+            'status': response.status_code,
+            'queries': len(queries),
+            'seconds': round(elapsed, 6),
+        }
+    return results
+
+
+@pytest.mark.django_db
+def test_query_count_does_not_grow_with_data(
+    mixer, user, post_with_published_location, published_category,
+    published_locations, tmp_path
+):
+    target = post_with_published_location
+    comment = mixer.blend('blog.Comment', post=target, author=user)
+    tag = mixer.blend('blog.Tag')
+    urls = _route_urls(user, target, comment, published_category, tag)
+
+    _seed(mixer, N_SMALL, user, target, published_category,
+          published_locations)
+    small = _measure(user, urls)
+    _seed(mixer, N_LARGE - N_SMALL, user, target, published_category,
+          published_locations)
+    large = _measure(user, urls)
+
+    report_path = Path(
+        os.environ.get(REPORT_ENV) or tmp_path / 'query_budget.json'
+    )
+    report_path.write_text(json.dumps(
+        {'n_small': N_SMALL, 'n_large': N_LARGE,
+         'routes': {name: {'small': small[name], 'large': large[name]}
+                    for name in urls}},
+        ensure_ascii=False, indent=2, sort_keys=True
+    ), encoding='utf-8')
+
+    grown = {
+        name: (small[name]['queries'], large[name]['queries'])
+        for name in urls
+        if large[name]['queries'] > small[name]['queries']
+    }
+    assert not grown, (
+        'Число запросов к БД растёт вместе с объёмом данных '
+        f'(маршрут: (N={N_SMALL}, N={N_LARGE})): {grown}'
+    )
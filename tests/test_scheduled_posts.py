@@ -0,0 +1,29 @@
+from datetime import timedelta
+
+import pytest
+from django.utils import timezone
+
+from blog.cache import get_feed_version
+from blog.models import Post
+from blog.tasks import publish_scheduled_posts
+
+
+@pytest.mark.django_db
+def test_publish_scheduled_posts(client, future_posts):
+    post = future_posts[0]
+    assert not post.is_visible
+    assert client.get(f'/posts/{post.id}/').status_code == 404
+
+    Post.objects.filter(pk=post.pk).update(
+        pub_date=timezone.now() - timedelta(minutes=1)
+    )
+    feed_version = get_feed_version()
+    assert publish_scheduled_posts() == 1
+    assert get_feed_version() != feed_version, (
+        'Убедитесь, что публикация отложенных постов меняет версию лент.'
+    )
+
+    post.refresh_from_db()
+    assert post.is_visible
+    assert client.get(f'/posts/{post.id}/').status_code == 200
+    assert publish_scheduled_posts() == 0
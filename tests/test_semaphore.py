@@ -0,0 +1,369 @@
+import json
+import threading
+import time
+
+import pytest
+from redis import Redis
+from redis.exceptions import WatchError
+
+from blog.semaphore import (
+    InMemoryBackend, LeaseExpired, LeaseSemaphore, RedisBackend,
+    SemaphoreTimeout
+)
+
+
+class FakeClock:
+    """Управляемые часы семафора."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+class FakeRedis(Redis):
+    """Redis в памяти: ровно те команды, которые использует RedisBackend.
+
+    Транзакции выполняет настоящий Redis.transaction из redis-py,
+    поэтому проверяется и его цикл повторов после WatchError.
+    conflicts — число транзакций, которые «испортит» конкурентная
+    запись между WATCH и EXEC.
+    """
+
+    def __init__(self, server_time=(1000, 500000)):
+        super().__init__()
+        self.server_time = server_time
+        self.conflicts = 0
+        self.data = {}
+        self.versions = {}
+        self.lists = {}
+        self.expires = {}
+        self.condition = threading.Condition()
+
+    def pipeline(self, transaction=True, shard_hint=None):
+        return FakePipeline(self)
+
+    def write(self, key, value):
+        with self.condition:
+            self.data[key] = value
+            self.versions[key] = self.versions.get(key, 0) + 1
+
+    def rpush(self, key, value):
+        with self.condition:
+            self.lists.setdefault(key, []).append(value)
+            self.condition.notify_all()
+
+    def expire(self, key, seconds):
+        self.expires[key] = seconds
+
+    def blpop(self, keys, timeout=0):
+        with self.condition:
+            ready = self.condition.wait_for(
+                lambda: any(self.lists.get(key) for key in keys), timeout
+            )
+            if not ready:
+                return None
+            key = next(key for key in keys if self.lists.get(key))
+            value = self.lists[key].pop(0)
+            if not self.lists[key]:
+                del self.lists[key]
+            return key, value
+
+    def delete(self, *keys):
+        with self.condition:
+            for key in keys:
+                self.lists.pop(key, None)
+                self.data.pop(key, None)
+
+
+class FakePipeline:
+    """Конвейер FakeRedis: команды после WATCH выполняются сразу."""
+
+    def __init__(self, client):
+        self.client = client
+        self.reset()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.reset()
+
+    def reset(self):
+        self.watched = {}
+        self.commands = []
+
+    def watch(self, *keys):
+        self.watched = {key: self.client.versions.get(key) for key in keys}
+
+    def get(self, key):
+        return self.client.data.get(key)
+
+    def time(self):
+        return self.client.server_time
+
+    def multi(self):
+        pass
+
+    def set(self, key, value):
+        self.commands.append((self.client.write, key, value))
+
+    def rpush(self, key, value):
+        self.commands.append((self.client.rpush, key, value))
+
+    def expire(self, key, seconds):
+        self.commands.append((self.client.expire, key, seconds))
+
+    def execute(self):
+        if self.client.conflicts and self.watched:
+            self.client.conflicts -= 1
+            for key in self.watched:
+                self.client.write(key, self.client.data.get(key))
+        changed = any(
+            self.client.versions.get(key) != version
+            for key, version in self.watched.items()
+        )
+        commands = self.commands
+        self.reset()
+        if changed:
+            raise WatchError('watched key changed')
+        return [command(*args) for command, *args in commands]
+
+
+class CountingBackend(InMemoryBackend):
+    """InMemoryBackend, считающий транзакции над состоянием."""
+
+    transactions = 0
+
+    def transaction(self, name, func):
+        self.transactions += 1
+        return super().transaction(name, func)
+
+
+def make_semaphore(clock, capacity=2, **kwargs):
+    return LeaseSemaphore(
+        InMemoryBackend(clock), 'llm', capacity, ttl=10,
+        refresh_interval=0.05, **kwargs
+    )
+
+
+def wait_for(predicate, timeout=2):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, 'условие не выполнилось'
+        time.sleep(0.005)
+
+
+def test_acquire_and_release(clock):
+    semaphore = make_semaphore(clock)
+    with semaphore.acquire() as lease:
+        assert semaphore.metrics()['in_use'] == 1
+        clock.advance(3)
+    assert lease.released
+    metrics = semaphore.metrics()
+    assert metrics['in_use'] == 0
+    assert metrics['acquired'] == metrics['released'] == 1
+    assert metrics['hold_total'] == metrics['hold_max'] == 3
+
+
+def test_timeout_when_full(clock):
+    semaphore = make_semaphore(clock, capacity=1)
+    semaphore.acquire()
+    with pytest.raises(SemaphoreTimeout):
+        semaphore.acquire(timeout=0.02)
+    metrics = semaphore.metrics()
+    assert metrics['timeouts'] == 1
+    assert metrics['queue_depth'] == 0
+
+
+def test_expired_lease_is_reclaimed(clock):
+    """Слот воркера, упавшего без release, возвращается по ttl."""
+    semaphore = make_semaphore(clock, capacity=1)
+    crashed = semaphore.acquire()
+    clock.advance(11)
+    lease = semaphore.acquire(timeout=0.1)
+    assert semaphore.metrics()['expired'] == 1
+    with pytest.raises(LeaseExpired):
+        crashed.heartbeat()
+    assert crashed.release() is False
+    assert lease.release() is True
+
+
+def test_heartbeat_keeps_lease(clock):
+    semaphore = make_semaphore(clock, capacity=1)
+    lease = semaphore.acquire()
+    for _ in range(3):
+        clock.advance(8)
+        lease.heartbeat()
+    with pytest.raises(SemaphoreTimeout):
+        semaphore.acquire(timeout=0.02)
+    assert semaphore.metrics()['expired'] == 0
+    assert lease.release() is True
+
+
+def test_waiters_are_served_in_order(clock):
+    semaphore = make_semaphore(clock, capacity=1)
+    first = semaphore.acquire()
+    order = []
+
+    def worker(number):
+        with semaphore.acquire(timeout=2):
+            order.append(number)
+
+    threads = []
+    for number in range(4):
+        thread = threading.Thread(target=worker, args=(number,))
+        thread.start()
+        threads.append(thread)
+        wait_for(lambda: semaphore.metrics()['queue_depth'] == number + 1)
+    first.release()
+    for thread in threads:
+        thread.join()
+    assert order == [0, 1, 2, 3]
+
+
+def test_heavy_request_is_not_starved(clock):
+    """Лёгкие запросы не обгоняют тяжёлый, ждущий освобождения слотов."""
+    semaphore = make_semaphore(clock, capacity=2, weights={'batch': 2})
+    light = semaphore.acquire()
+    acquired = []
+
+    def worker(tenant):
+        with semaphore.acquire(tenant, timeout=2):
+            acquired.append(tenant)
+
+    heavy = threading.Thread(target=worker, args=('batch',))
+    heavy.start()
+    wait_for(lambda: semaphore.metrics()['queue_depth'] == 1)
+    late = threading.Thread(target=worker, args=('chat',))
+    late.start()
+    wait_for(lambda: semaphore.metrics()['queue_depth'] == 2)
+    # Свободный слот есть, но он не достаётся опоздавшему.
+    assert semaphore.metrics()['in_use'] == 1
+    light.release()
+    heavy.join()
+    late.join()
+    assert acquired == ['batch', 'chat']
+
+
+def test_tenant_limit_lets_others_pass(clock):
+    semaphore = make_semaphore(clock, capacity=3, tenant_limits={'bulk': 1})
+    semaphore.acquire('bulk')
+    blocked = threading.Thread(
+        target=lambda: semaphore.acquire('bulk', timeout=2).release()
+    )
+    blocked.start()
+    wait_for(lambda: semaphore.metrics()['queue_depth'] == 1)
+    lease = semaphore.acquire('chat', timeout=0.1)
+    metrics = semaphore.metrics()
+    assert metrics['in_use_by_tenant'] == {'bulk': 1, 'chat': 1}
+    assert metrics['queue_depth'] == 1
+    lease.release()
+    assert blocked.is_alive()
+    clock.advance(11)
+    blocked.join()
+
+
+def test_weight_must_fit():
+    semaphore = make_semaphore(FakeClock(), tenant_limits={'bulk': 1})
+    with pytest.raises(ValueError):
+        semaphore.acquire(weight=3)
+    with pytest.raises(ValueError):
+        semaphore.acquire('bulk', weight=2)
+
+
+def test_wait_metrics(clock):
+    semaphore = make_semaphore(clock, capacity=1)
+    first = semaphore.acquire()
+    waiter = threading.Thread(
+        target=lambda: semaphore.acquire(timeout=2).release()
+    )
+    waiter.start()
+    wait_for(lambda: semaphore.metrics()['queue_depth'] == 1)
+    clock.advance(5)
+    first.release()
+    waiter.join()
+    metrics = semaphore.metrics()
+    assert metrics['acquired'] == 2
+    assert metrics['wait_max'] == 5
+    assert metrics['queue_depth_max'] == 1
+
+
+def test_waiters_block_instead_of_polling(clock):
+    backend = CountingBackend(clock)
+    semaphore = LeaseSemaphore(backend, 'llm', 1, ttl=10, refresh_interval=5)
+    first = semaphore.acquire()
+    waiter = threading.Thread(
+        target=lambda: semaphore.acquire(timeout=2).release()
+    )
+    waiter.start()
+    wait_for(lambda: semaphore.metrics()['queue_depth'] == 1)
+    transactions = backend.transactions
+    time.sleep(0.1)
+    assert backend.transactions == transactions, (
+        'Убедитесь, что ожидающий не обращается к состоянию семафора, '
+        'пока его не разбудят.'
+    )
+    started = time.monotonic()
+    first.release()
+    waiter.join()
+    assert time.monotonic() - started < 1, (
+        'Убедитесь, что освобождение аренды будит ожидающего.'
+    )
+
+
+def test_redis_backend_retries_after_watch_error():
+    client = FakeRedis()
+    client.conflicts = 1
+    backend = RedisBackend(client)
+    calls = []
+
+    def func(state, now):
+        calls.append(now)
+        state['holders']['lease'] = {'weight': 1}
+        return 'ok'
+
+    assert backend.transaction('llm', func) == 'ok'
+    assert calls == [1000.5, 1000.5], (
+        'Убедитесь, что транзакция повторяется после WatchError '
+        'и использует время сервера Redis.'
+    )
+    state = json.loads(client.data['semaphore:llm'])
+    assert state['holders'] == {'lease': {'weight': 1}}
+
+
+def test_semaphore_over_redis_backend():
+    client = FakeRedis()
+    semaphore = LeaseSemaphore(
+        RedisBackend(client), 'llm', 1, ttl=10, refresh_interval=5
+    )
+    first = semaphore.acquire()
+    waiter = threading.Thread(
+        target=lambda: semaphore.acquire(timeout=2).release()
+    )
+    waiter.start()
+    wait_for(lambda: semaphore.metrics()['queue_depth'] == 1)
+    started = time.monotonic()
+    first.release()
+    waiter.join()
+    assert time.monotonic() - started < 1, (
+        'Убедитесь, что ожидающий будится через список в Redis.'
+    )
+    metrics = semaphore.metrics()
+    assert metrics['acquired'] == metrics['released'] == 2
+    assert not client.lists, 'Убедитесь, что сигналы не остаются в Redis.'
+    assert set(client.expires.values()) == {10}
+
+    semaphore.acquire()
+    with pytest.raises(SemaphoreTimeout):
+        semaphore.acquire(timeout=0.02)
+    assert semaphore.metrics()['timeouts'] == 1
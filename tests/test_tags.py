@@ -0,0 +1,86 @@
+import json
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from blog.models import Tag
+
+
+@pytest.mark.django_db
+def test_toggle_tags_status_in_one_update(user_client, mixer):
+    tags = mixer.cycle(5).blend('blog.Tag', status=Tag.Status.ACTIVE)
+    ids = [tag.id for tag in tags]
+
+    with CaptureQueriesContext(connection) as queries:
+        response = user_client.post(
+            '/api/tags/toggle-status/',
+            json.dumps({'ids': ids + [0]}),
+            content_type='application/json'
+        )
+    data = response.json()
+    assert data['success'] and data['not_found'] == [0]
+    updates = [
+        query for query in queries
+        if query['sql'].startswith('UPDATE "blog_tag"')
+    ]
+    assert len(updates) == 1, (
+        'Убедитесь, что статусы тегов меняются одним запросом UPDATE.'
+    )
+    assert set(
+        Tag.objects.filter(id__in=ids).values_list('status', flat=True)
+    ) == {Tag.Status.INACTIVE}
+
+    response = user_client.post(
+        '/api/tags/toggle-status/',
+        json.dumps({'ids': ids[:2], 'status': 'unknown'}),
+        content_type='application/json'
+    )
+    assert response.status_code == 400
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('url', ('toggle-status', 'delete'))
+@pytest.mark.parametrize('body', ([1, 2], 5, '"ids"', 'null', '{'))
+def test_bulk_tags_reject_malformed_body(user_client, url, body):
+    response = user_client.post(
+        f'/api/tags/{url}/',
+        body if isinstance(body, str) else json.dumps(body),
+        content_type='application/json'
+    )
+    assert response.status_code == 400, (
+        'Убедитесь, что тело запроса, не являющееся JSON-объектом, '
+        'отклоняется со статусом 400.'
+    )
+
+
+@pytest.mark.django_db
+def test_delete_tags(user_client, mixer, post_with_published_location):
+    tags = mixer.cycle(3).blend('blog.Tag')
+    post_with_published_location.tags.set(tags)
+
+    response = user_client.delete(
+        '/api/tags/delete/',
+        json.dumps({'ids': [tag.id for tag in tags[:2]]}),
+        content_type='application/json'
+    )
+    assert response.json() == {'success': True, 'deleted': 2}
+    assert list(post_with_published_location.tags.all()) == tags[2:]
+
+
+@pytest.mark.django_db
+def test_list_prefetches_tags(
+    user_client, mixer, many_posts_with_published_locations
+):
+    tags = mixer.cycle(3).blend('blog.Tag')
+    for post in many_posts_with_published_locations:
+        post.tags.set(tags)
+
+    response = user_client.get('/list/')
+    with CaptureQueriesContext(connection) as queries:
+        content = b''.join(response.streaming_content).decode('utf-8')
+    assert all(f'data-tag-id="{tag.id}"' in content for tag in tags)
+    assert len(queries) == 2, (
+        'Убедитесь, что теги документов загружаются через prefetch_related, '
+        'без отдельного запроса на каждый документ.'
+    )